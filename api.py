@@ -8,13 +8,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
 from typing import Optional, List
-import os, json, datetime, urllib.parse, requests, smtplib, threading, uuid
+import os, datetime, urllib.parse, requests, smtplib, threading, uuid
 from io import BytesIO
+from functools import lru_cache
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
 
-from persistence_pg import load_state, save_state_to_db, init_db, StaleStateError
+from persistence_pg import load_state, save_state_to_db, init_db, dumps_state, StaleStateError
 from object_store import upload_bytes, get_view_url
 
 # Cloud hosts run on UTC — stamp timestamps in the company timezone instead.
@@ -55,6 +56,10 @@ def startup_event():
     try: init_db()
     except Exception as e: print(f"DB init warning: {e}")
 
+# Shared keep-alive pool for outbound calls (Google userinfo on every request,
+# geocoding, weather) - reused connections skip the TLS handshake
+_http = requests.Session()
+
 # ── State Cache ────────────────────────────────────────────────────────────────
 
 _state_cache: dict = {}
@@ -96,8 +101,8 @@ def verify_google_token(authorization: str = Header(None)) -> dict:
         raise HTTPException(status_code=401, detail="Missing or invalid Authorization header.")
     token = authorization.split(" ", 1)[1]
     try:
-        r = requests.get("https://www.googleapis.com/oauth2/v1/userinfo",
-                         headers={"Authorization": f"Bearer {token}"}, timeout=10)
+        r = _http.get("https://www.googleapis.com/oauth2/v1/userinfo",
+                      headers={"Authorization": f"Bearer {token}"}, timeout=10)
         if r.status_code != 200:
             raise HTTPException(status_code=401, detail="Invalid Google token.")
         user = r.json()
@@ -171,47 +176,65 @@ class AdminEmailIn(BaseModel):
 # ── Helpers ────────────────────────────────────────────────────────────────────
 
 def get_api_key(): return os.environ.get("GEMINI_API_KEY") or os.environ.get("API_KEY")
-def _tech(tid): return next((t for t in get_state()["techs"] if t["id"] == tid), None)
-def _loc(lid): return next((l for l in get_state()["locations"] if l["id"] == lid), None)
-def _job(jid): return next((j for j in get_state()["jobs"] if j["id"] == jid), None)
+_id_indexes: dict = {}
+
+def _by_id(kind):
+    # id -> record map per list, rebuilt only when the list is replaced (reload,
+    # delete-by-comprehension) or resized (insert/append). Records are edited
+    # in place, so the map stays valid across PATCHes.
+    items = get_state()[kind]
+    hit = _id_indexes.get(kind)
+    if hit is None or hit[0] is not items or hit[1] != len(items):
+        hit = (items, len(items), {x["id"]: x for x in reversed(items)})
+        _id_indexes[kind] = hit
+    return hit[2]
+
+def _tech(tid): return _by_id("techs").get(tid)
+def _loc(lid): return _by_id("locations").get(lid)
+def _job(jid): return _by_id("jobs").get(jid)
 
 def get_model(api_key):
     if not HAS_GENAI: return None, "gemini-flash-latest"
+    try: return _discover_model(api_key)
+    # Listing failed - fall back for this call only; failures aren't cached
+    except Exception: return genai.Client(api_key=api_key), 'gemini-flash-latest'
+
+@lru_cache(maxsize=4)
+def _discover_model(api_key):
+    # Model discovery is a network round-trip; the answer only changes per key.
     client = genai.Client(api_key=api_key)
-    try:
-        models = list(client.models.list())
-        exclude = ('tts', 'image', 'audio', 'live', 'embed', 'veo', 'imagen', 'aqa')
-
-        def text_capable(m):
-            # google-genai SDK uses 'supported_actions'; legacy SDK used 'supported_generation_methods'
-            acts = getattr(m, 'supported_actions', None) or getattr(m, 'supported_generation_methods', None)
-            return not acts or 'generateContent' in acts or 'generate_content' in acts
-
-        valid = [m for m in models if 'gemini' in m.name.lower()
-                 and not any(x in m.name.lower() for x in exclude) and text_capable(m)]
-        for pat in ['gemini-2.5-flash', 'gemini-flash-latest', 'gemini-2.0-flash', 'gemini-2.5-pro', 'flash']:
-            best = (next((m for m in valid if m.name.lower().split('/')[-1] == pat), None)
-                    or next((m for m in valid if pat in m.name.lower() and 'preview' not in m.name.lower()), None)
-                    or next((m for m in valid if pat in m.name.lower()), None))
-            if best: return client, best.name
-        if valid: return client, valid[0].name
-    except Exception: pass
+    models = list(client.models.list())
+    exclude = ('tts', 'image', 'audio', 'live', 'embed', 'veo', 'imagen', 'aqa')
+
+    def text_capable(m):
+        # google-genai SDK uses 'supported_actions'; legacy SDK used 'supported_generation_methods'
+        acts = getattr(m, 'supported_actions', None) or getattr(m, 'supported_generation_methods', None)
+        return not acts or 'generateContent' in acts or 'generate_content' in acts
+
+    valid = [m for m in models if 'gemini' in m.name.lower()
+             and not any(x in m.name.lower() for x in exclude) and text_capable(m)]
+    for pat in ['gemini-2.5-flash', 'gemini-flash-latest', 'gemini-2.0-flash', 'gemini-2.5-pro', 'flash']:
+        best = (next((m for m in valid if m.name.lower().split('/')[-1] == pat), None)
+                or next((m for m in valid if pat in m.name.lower() and 'preview' not in m.name.lower()), None)
+                or next((m for m in valid if pat in m.name.lower()), None))
+        if best: return client, best.name
+    if valid: return client, valid[0].name
     return client, 'gemini-flash-latest'
 
 def weather_for(address):
     try:
         enc = urllib.parse.quote(address.strip())
-        r = requests.get(f"https://geocoding-api.open-meteo.com/v1/search?name={enc}&count=1&language=en&format=json", timeout=5)
+        r = _http.get(f"https://geocoding-api.open-meteo.com/v1/search?name={enc}&count=1&language=en&format=json", timeout=5)
         data = r.json()
         if not data.get("results"):
             parts = [p.strip() for p in address.split(",")]
             city = parts[1] if len(parts) >= 3 else parts[0]
-            r = requests.get(f"https://geocoding-api.open-meteo.com/v1/search?name={urllib.parse.quote(city)}&count=1&language=en&format=json", timeout=5)
+            r = _http.get(f"https://geocoding-api.open-meteo.com/v1/search?name={urllib.parse.quote(city)}&count=1&language=en&format=json", timeout=5)
             data = r.json()
         res = data.get("results", [])
         if not res: return None
         lat, lon = res[0]["latitude"], res[0]["longitude"]
-        wx = requests.get(f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,weather_code&temperature_unit=fahrenheit&timezone=auto", timeout=5).json()
+        wx = _http.get(f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,weather_code&temperature_unit=fahrenheit&timezone=auto", timeout=5).json()
         cur = wx.get("current", {}); temp = cur.get("temperature_2m"); code = cur.get("weather_code")
         cmap = {0:"☀️ Clear",1:"⛅ Partly Cloudy",2:"⛅ Partly Cloudy",3:"⛅ Partly Cloudy",
                 45:"🌫️ Foggy",48:"🌫️ Foggy",51:"🌧️ Drizzle",53:"🌧️ Drizzle",55:"🌧️ Drizzle",
@@ -316,7 +339,7 @@ def list_jobs(search: Optional[str] = None, user: dict = Depends(verify_google_t
 @app.post("/jobs", status_code=201)
 def create_job(job: JobIn, user: dict = Depends(require_admin)):
     state = get_state()
-    nj = {"id": f"j{len(state['jobs'])+100}_{now_local().timestamp()}",
+    nj = {"id": f"j_{uuid.uuid4().hex[:12]}",
           "title": job.title, "description": job.description, "type": job.type,
           "priority": job.priority, "status": "Pending", "locationId": job.locationId,
           "techId": job.techId, "date": job.date, "reports": []}
@@ -337,11 +360,10 @@ def get_job_detail(job_id: str, user: dict = Depends(verify_google_token)):
 
 @app.patch("/jobs/{job_id}")
 def update_job(job_id: str, updates: JobUpdate, user: dict = Depends(verify_google_token)):
-    state = get_state()
-    idx = next((i for i,j in enumerate(state["jobs"]) if j["id"]==job_id), -1)
-    if idx == -1: raise HTTPException(404, "Job not found")
-    for f,v in updates.dict(exclude_none=True).items(): state["jobs"][idx][f] = v
-    save_state(); return state["jobs"][idx]
+    j = _job(job_id)
+    if not j: raise HTTPException(404, "Job not found")
+    for f,v in updates.dict(exclude_none=True).items(): j[f] = v
+    save_state(); return j
 
 @app.delete("/jobs/{job_id}", status_code=204)
 def delete_job(job_id: str, user: dict = Depends(require_admin)):
@@ -404,18 +426,17 @@ def list_techs(user: dict = Depends(verify_google_token)): return {"techs": get_
 def create_tech(tech: TechIn, user: dict = Depends(require_admin)):
     state = get_state()
     colors = ['#7f1d1d','#3f3f46','#b91c1c','#52525b','#991b1b','#7c2d12','#292524']
-    nt = {"id": f"t{len(state['techs'])+1}_{now_local().timestamp()}",
+    nt = {"id": f"t_{uuid.uuid4().hex[:12]}",
           "name": tech.name, "email": tech.email, "initials": tech.initials,
           "color": tech.color or colors[len(state["techs"]) % len(colors)], "skills": tech.skills or []}
     state["techs"].append(nt); save_state(invalidate_briefing=False); return nt
 
 @app.patch("/techs/{tech_id}")
 def update_tech(tech_id: str, updates: TechUpdate, user: dict = Depends(require_admin)):
-    state = get_state()
-    idx = next((i for i,t in enumerate(state["techs"]) if t["id"]==tech_id), -1)
-    if idx == -1: raise HTTPException(404, "Tech not found")
-    for f,v in updates.dict(exclude_none=True).items(): state["techs"][idx][f] = v
-    save_state(invalidate_briefing=False); return state["techs"][idx]
+    t = _tech(tech_id)
+    if not t: raise HTTPException(404, "Tech not found")
+    for f,v in updates.dict(exclude_none=True).items(): t[f] = v
+    save_state(invalidate_briefing=False); return t
 
 @app.delete("/techs/{tech_id}", status_code=204)
 def delete_tech(tech_id: str, user: dict = Depends(require_admin)):
@@ -430,7 +451,7 @@ def list_locations(user: dict = Depends(verify_google_token)): return {"location
 @app.post("/locations", status_code=201)
 def create_location(loc: LocationIn, user: dict = Depends(require_admin)):
     state = get_state()
-    nl = {"id": f"l{len(state['locations'])+1}_{now_local().timestamp()}",
+    nl = {"id": f"l_{uuid.uuid4().hex[:12]}",
           "name": loc.name, "address": loc.address, "contact_name": loc.contact_name or "",
           "contact_phone": loc.contact_phone or "", "contact_email": loc.contact_email or ""}
     w = weather_for(loc.address)
@@ -439,11 +460,10 @@ def create_location(loc: LocationIn, user: dict = Depends(require_admin)):
 
 @app.patch("/locations/{loc_id}")
 def update_location(loc_id: str, updates: LocationUpdate, user: dict = Depends(require_admin)):
-    state = get_state()
-    idx = next((i for i,l in enumerate(state["locations"]) if l["id"]==loc_id), -1)
-    if idx == -1: raise HTTPException(404, "Location not found")
-    for f,v in updates.dict(exclude_none=True).items(): state["locations"][idx][f] = v
-    save_state(invalidate_briefing=False); return state["locations"][idx]
+    l = _loc(loc_id)
+    if not l: raise HTTPException(404, "Location not found")
+    for f,v in updates.dict(exclude_none=True).items(): l[f] = v
+    save_state(invalidate_briefing=False); return l
 
 @app.delete("/locations/{loc_id}", status_code=204)
 def delete_location(loc_id: str, user: dict = Depends(require_admin)):
@@ -475,7 +495,7 @@ def chat(msg: ChatIn, user: dict = Depends(verify_google_token)):
     api_key = get_api_key()
     if not api_key or not HAS_GENAI: raise HTTPException(503, "AI not available")
     state = get_state(); client, model = get_model(api_key)
-    ctx = f"You are an AI assistant for the 5G Security Job Board.\nJobs: {json.dumps(state['jobs'],default=str)}\nTechs: {json.dumps(state['techs'])}\nLocations: {json.dumps(state['locations'])}"
+    ctx = f"You are an AI assistant for the 5G Security Job Board.\nJobs: {dumps_state(state['jobs'],default=str)}\nTechs: {dumps_state(state['techs'])}\nLocations: {dumps_state(state['locations'])}"
     contents = [{"role":"user","parts":[ctx]}] + (msg.history or []) + [{"role":"user","parts":[msg.message]}]
     try: return {"reply": client.models.generate_content(model=model, contents=contents).text}
     except Exception as e: raise HTTPException(500, str(e))
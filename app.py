@@ -1,6 +1,4 @@
 import streamlit as st
-from google import genai
-from google.genai import types
 import datetime
 import base64
 import os
@@ -11,11 +9,19 @@ import hashlib
 import smtplib
 import urllib.parse
 import requests
-import pandas as pd
 import calendar
-import numpy as np
 import threading
+import queue
+import uuid
+import atexit
+import contextlib
+import copy
+import functools
 import time
+import string
+import concurrent.futures
+import collections
+import importlib.util
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
@@ -26,27 +32,23 @@ from persistence_pg import (
     commit_from_session,
     force_overwrite_from_session,
     load_state,
+    load_state_cached,
     get_db_version,
+    get_db_version_recent,
+    append_report_to_db,
+    set_job_fields_in_db,
+    dumps_state,
+    loads_state,
     StaleStateError,
 )
-from object_store import upload_streamlit_file, upload_bytes, get_view_url
+from object_store import upload_streamlit_file, upload_bytes, get_view_url, IMMUTABLE_CACHE_CONTROL
 
 import io
-from reportlab.lib.utils import ImageReader
 
-# Try importing ReportLab for PDF generation
-try:
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import letter
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import (
-        SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
-        Image as RLImage, KeepTogether, PageBreak,
-    )
-    HAS_REPORTLAB = True
-except ImportError:
-    HAS_REPORTLAB = False
+# ReportLab (PDF reports) and pandas (analytics, hours, CSV export) are imported
+# inside the functions that use them: most sessions - the login screen, the
+# boards - never build a PDF or a DataFrame, and both are slow cold imports.
+HAS_REPORTLAB = importlib.util.find_spec("reportlab") is not None
 
 # Try importing Streamlit Drawable Canvas for signatures
 try:
@@ -79,6 +81,17 @@ try:
 except ImportError:
     ZoneInfo = None
 
+@functools.lru_cache(maxsize=None)
+def config_value(key, default=None):
+    """A setting from st.secrets, else the environment, else default. Read once
+    per process per key - secrets.toml lookups aren't free and several of these
+    sit on every rerun (auth cookie, kiosk token, domain check)."""
+    try:
+        val = st.secrets[key] if key in st.secrets else None
+    except Exception:
+        val = None  # no secrets file
+    return val or os.getenv(key) or default
+
 def _resolve_app_timezone():
     tz_name = os.getenv("APP_TIMEZONE")
     if not tz_name:
@@ -131,129 +144,24 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS to match the React App's Zinc/Red/Black theme
-st.markdown("""
-   <style>
-   /* Main Background */
-   .stApp {
-       background-color: #09090b;
-       color: #e4e4e7;
-   }
-   
-   /* Inputs */
-   .stTextInput > div > div > input, .stTextArea > div > div > textarea, .stSelectbox > div > div > div, .stNumberInput > div > div > input, .stMultiSelect > div > div > div {
-       background-color: #000000;
-       color: white;
-       border-color: #27272a;
-   }
-
-   /* Time Input */
-   input[type="time"] {
-       background-color: #000000;
-       color: white;
-   }
-
-   /* Sidebar */
-   [data-testid="stSidebar"] {
-       background-color: #18181b;
-       border-right: 1px solid #27272a;
-   }
-
-   /* Tighter page headroom (Streamlit's fixed header bar is ~3.75rem tall and
-      floats over content, so padding must clear it) */
-   .block-container {
-       padding-top: 4.2rem !important;
-   }
-
-   /* Buttons */
-   .stButton > button {
-       background-color: #b91c1c;
-       color: white;
-       border: none;
-       border-radius: 8px;
-       font-weight: bold;
-       min-height: 2rem;
-       width: 100%;
-       padding: 0.3rem 0.8rem !important;
-   }
-   .stButton > button:hover {
-       background-color: #991b1b;
-       color: white;
-       border-color: #7f1d1d;
-   }
-   /* Fix for button text centering */
-   .stButton > button div {
-       display: flex;
-       align-items: center;
-       justify-content: center;
-   }
-   .stButton > button p {
-       margin: 0 !important;
-       line-height: 1.2 !important;
-       white-space: nowrap;
-   }
-
-   /* Custom Job Card Style */
-   .job-card {
-       background-color: #18181b;
-       border: 1px solid #27272a;
-       padding: 15px;
-       border-radius: 10px;
-       border-left: 5px solid #52525b;
-       margin-bottom: 10px;
-       transition: transform 0.2s;
-   }
-   .priority-Critical { border-left-color: #ef4444 !important; }
-   .priority-High { border-left-color: #dc2626 !important; }
-   .priority-Medium { border-left-color: #7f1d1d !important; }
-   .priority-Low { border-left-color: #52525b !important; }
-
-   /* Tabs: underline style (active = white text + red underline) */
-   .stTabs [data-baseweb="tab-list"] {
-       gap: 2px;
-       border-bottom: 1px solid #27272a;
-   }
-   .stTabs [data-baseweb="tab"] {
-       background-color: transparent;
-       border-radius: 0;
-       color: #a1a1aa;
-       padding: 4px 10px;
-   }
-   .stTabs [data-baseweb="tab"]:hover {
-       color: #e4e4e7;
-   }
-   .stTabs [aria-selected="true"] {
-       background-color: transparent !important;
-       color: white !important;
-       font-weight: bold;
-   }
-   .stTabs [data-baseweb="tab-highlight"] {
-       background-color: #b91c1c !important;
-       height: 3px !important;
-   }
-   .stTabs [data-baseweb="tab-border"] {
-       background-color: #27272a !important;
-   }
-   
-   /* Login Screen Container */
-   .login-container {
-       display: flex;
-       justify-content: center;
-       align-items: center;
-       height: 70vh;
-       text-align: center;
-   }
-   .login-box {
-       background-color: #18181b;
-       border: 1px solid #27272a;
-       padding: 40px;
-       border-radius: 12px;
-       max-width: 400px;
-       width: 100%;
-       box-shadow: 0 10px 15px -3px rgba(0, 0, 0, 0.5);
-   }
-   </style>
-""", unsafe_allow_html=True)
+# Custom CSS to match the React App's Zinc/Red/Black theme. Streamlit drops any
+# element a rerun doesn't re-emit, so the <style> tag is still written every run;
+# only the file read and string building are done once per process.
+STYLE_PATH = "assets/style.css"
+
+@st.cache_resource(show_spinner=False)
+def get_app_css():
+    with open(STYLE_PATH, encoding="utf-8") as f:
+        return f"<style>{f.read()}</style>"
+
+st.markdown(get_app_css(), unsafe_allow_html=True)
+
+@st.cache_resource(show_spinner=False)
+def get_http_session():
+    """One requests.Session per process for outbound API calls (OAuth, geocoding,
+    weather, photo downloads): its connection pool keeps sockets alive, so
+    repeat calls to the same host skip the TCP + TLS handshake."""
+    return requests.Session()
 
 # Brand logo in the sidebar (no-op until assets/logo.png is committed to the repo)
 try:
@@ -308,9 +216,10 @@ def _sync_session_to_db():
 
 def refresh_session_from_db():
     """Reloads the DB row and replaces this session's working data with fresh state."""
-    data, version = load_state()
+    data, version = load_state_cached()
     st.session_state.db = data
     st.session_state._db_version = version
+    st.session_state.pop('_save_failed', None)
     st.session_state.jobs = data.get("jobs", [])
     st.session_state.techs = data.get("techs", [])
     st.session_state.locations = data.get("locations", [])
@@ -321,9 +230,21 @@ def refresh_session_from_db():
     st.session_state.smtp_settings = data.get("smtp_settings", {})
     st.session_state.last_reminder_date = data.get("last_reminder_date")
 
+def synced_db_version():
+    """_db_version, but only when this session's data is exactly what was saved
+    at it - else None. Without a DB every session is at None, and a failed save
+    leaves local edits at the old version, so neither identifies the content."""
+    if st.session_state.get('_save_failed'):
+        return None
+    return st.session_state.get('_db_version')
+
 def save_state(invalidate_briefing=False):
     if invalidate_briefing:
         st.session_state.briefing = "Data required to generate briefing."
+    batch = st.session_state.get('_save_batch')
+    if batch is not None:
+        batch['pending'] = True  # flushed once by batched_saves()
+        return
     _sync_session_to_db()
     try:
         commit_from_session(invalidate_briefing=invalidate_briefing)
@@ -336,24 +257,109 @@ def save_state(invalidate_briefing=False):
             "with the latest data — please re-apply your last change."
         )
 
+def save_report(job_index, report, invalidate_briefing=False):
+    """save_state() for the common "new report (+ status change) on one job"
+    write: appends just that report to the stored row instead of re-sending the
+    whole state. The report must already be appended to the session job.
+    Falls back to a full save_state() if the row moved, inside batched_saves(),
+    or after a failed save (the delta would advance the version past unsaved edits)."""
+    if invalidate_briefing:
+        st.session_state.briefing = "Data required to generate briefing."
+    if st.session_state.get('_save_batch') is None and not st.session_state.get('_save_failed'):
+        job = st.session_state.jobs[job_index]
+        _sync_session_to_db()
+        try:
+            new_ver = append_report_to_db(
+                job_index, job['id'], report, st.session_state.get('_db_version'),
+                status=job.get('status'),
+                briefing=st.session_state.briefing if invalidate_briefing else None)
+        except Exception:
+            new_ver = None
+        if new_ver is not None:
+            st.session_state._db_version = new_ver
+            st.session_state.pop('_saved_digest', None)
+            return
+    save_state(invalidate_briefing=invalidate_briefing)
+
+def save_job_fields(job_index, fields, invalidate_briefing=False):
+    """save_state() for an edit confined to one job's top-level fields (a status
+    change, its parts list): writes just those fields into the stored row.
+    The fields must already be set on the session job. Same fallbacks as
+    save_report, including a full save while an earlier save has failed."""
+    if invalidate_briefing:
+        st.session_state.briefing = "Data required to generate briefing."
+    if st.session_state.get('_save_batch') is None and not st.session_state.get('_save_failed'):
+        job = st.session_state.jobs[job_index]
+        _sync_session_to_db()
+        try:
+            new_ver = set_job_fields_in_db(
+                job_index, job['id'], {f: job.get(f) for f in fields},
+                st.session_state.get('_db_version'),
+                briefing=st.session_state.briefing if invalidate_briefing else None)
+        except Exception:
+            new_ver = None
+        if new_ver is not None:
+            st.session_state._db_version = new_ver
+            st.session_state.pop('_saved_digest', None)
+            return
+    save_state(invalidate_briefing=invalidate_briefing)
+
+@contextlib.contextmanager
+def batched_saves():
+    """Coalesces every save_state() inside the block into a single commit when
+    the block exits (including via st.rerun()), so a run that makes several
+    mutations writes the state row once. Nested blocks join the outer one."""
+    if st.session_state.get('_save_batch') is not None:
+        yield
+        return
+    st.session_state._save_batch = {'pending': False}
+    try:
+        yield
+    finally:
+        batch = st.session_state.pop('_save_batch', None)
+        if batch and batch['pending']:
+            save_state()  # briefing invalidation was already applied per call
+
+def status_change_affects_briefing(old_status, new_status, priority):
+    """The morning briefing summarizes active jobs and their priorities, not
+    individual statuses. A status change only makes it stale when the job
+    enters/leaves the active set (Completed) or the job is Critical/High."""
+    return (old_status == 'Completed') != (new_status == 'Completed') or priority in ('Critical', 'High')
+
 def update_job_status_callback(job_id, widget_key):
     """Callback to update job status and save state."""
     new_status = st.session_state.get(widget_key)
     if not new_status:
         return
         
-    job_idx = next((i for i, j in enumerate(st.session_state.jobs) if j['id'] == job_id), -1)
+    job_idx = get_job_index(job_id)
     if job_idx != -1:
-        if st.session_state.jobs[job_idx]['status'] != new_status:
-            st.session_state.jobs[job_idx]['status'] = new_status
-            save_state()
+        job = st.session_state.jobs[job_idx]
+        if job['status'] != new_status:
+            invalidate = status_change_affects_briefing(job['status'], new_status, job.get('priority'))
+            job['status'] = new_status
+            save_job_fields(job_idx, ('status',), invalidate_briefing=invalidate)
+
+def remove_list_entry_callback(list_name, item_id=None, pick_key=None):
+    """Button callback: removes an entry (a dict matched on 'id', or a plain
+    value) from st.session_state.<list_name> and saves. With pick_key, the target
+    is read from that selectbox, which is then cleared. Callbacks run before the
+    rerun, so the list already renders without the entry - no st.rerun() needed."""
+    target = st.session_state.get(pick_key) if pick_key else item_id
+    if target is None:
+        return
+    items = st.session_state[list_name]
+    items[:] = [x for x in items if (x.get('id') if isinstance(x, dict) else x) != target]
+    if pick_key:
+        st.session_state[pick_key] = None
+    save_state(invalidate_briefing=False)
 
 def update_part_status_callback(job_id, part_id, widget_key):
     """Callback to update a single part's status inline and save state."""
     new_status = st.session_state.get(widget_key)
     if not new_status:
         return
-    job_idx = next((i for i, j in enumerate(st.session_state.jobs) if j['id'] == job_id), -1)
+    job_idx = get_job_index(job_id)
     if job_idx == -1:
         return
     for p in st.session_state.jobs[job_idx].get('parts', []):
@@ -361,7 +367,7 @@ def update_part_status_callback(job_id, part_id, widget_key):
             p['status'] = new_status
             p['updated_at'] = now_local().isoformat()
             p['added_by'] = st.session_state.user_info.get('email', p.get('added_by', 'unknown')) if "user_info" in st.session_state else p.get('added_by', 'unknown')
-            save_state(invalidate_briefing=False)
+            save_job_fields(job_idx, ('parts',))
             break
 
 # --- DB SESSION INITIALIZER (safe) ---
@@ -374,36 +380,38 @@ def init_db_session():
 init_db_session()
 
 # --- SESSION STATE INITIALIZATION ---
-if "jobs" not in st.session_state:
+# Hydrate once per session. setdefault() also fills keys added since an older
+# session was created (e.g. construction_emails, agreements) without touching
+# the working data it already holds.
+if "initialized" not in st.session_state:
     db_data = load_data()
-    st.session_state.jobs = db_data.get("jobs", [])
-    st.session_state.techs = db_data.get("techs", [])
-    st.session_state.locations = db_data.get("locations", [])
-    st.session_state.briefing = db_data.get("briefing", "Data required to generate briefing.")
-    st.session_state.adminEmails = db_data.get("adminEmails", [])
-    st.session_state.construction_emails = db_data.get("construction_emails", [])
-    st.session_state.agreements = db_data.get("agreements", [])
-    st.session_state.smtp_settings = db_data.get("smtp_settings", {})
-    st.session_state.last_reminder_date = db_data.get("last_reminder_date")
-
-# Back-compat: sessions created before a new key was added won't have it
-# (the block above is skipped because 'jobs' already exists), so initialize here.
-if "construction_emails" not in st.session_state:
-    try:
-        st.session_state.construction_emails = load_data().get("construction_emails", [])
-    except Exception:
-        st.session_state.construction_emails = []
-if "agreements" not in st.session_state:
-    try:
-        st.session_state.agreements = load_data().get("agreements", [])
-    except Exception:
-        st.session_state.agreements = []
+    for _key, _default in (("jobs", []), ("techs", []), ("locations", []),
+                           ("briefing", "Data required to generate briefing."),
+                           ("adminEmails", []), ("construction_emails", []), ("agreements", []),
+                           ("smtp_settings", {}), ("last_reminder_date", None)):
+        st.session_state.setdefault(_key, db_data.get(_key, _default))
+    st.session_state.initialized = True
 
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = [
         {"role": "model", "parts": ["Hello! I have access to your database. Ask me about active jobs, tech locations, or history."]}
     ]
 # Tech Colors for UI
+def new_record_id(prefix):
+    """Unique id for a new job/report/part/etc. Random rather than clock-based,
+    so two records created in the same tick (or by two users) can't collide."""
+    return f"{prefix}_{uuid.uuid4().hex[:12]}"
+
+def next_seq_id(items, prefix):
+    """Next sequential id ('t7', 'l12') for techs/locations, which keep their
+    short legacy ids. One pass for the highest existing number."""
+    top = 0
+    for x in items:
+        xid = x.get('id') or ''
+        if xid.startswith(prefix) and xid[len(prefix):].isdigit():
+            top = max(top, int(xid[len(prefix):]))
+    return f"{prefix}{top + 1}"
+
 def get_status_color(status):
     colors = {
         "Not Started": "#71717a",
@@ -418,6 +426,7 @@ def get_status_color(status):
     return colors.get(status, "#71717a")
 
 TECH_COLORS = ['#7f1d1d', '#3f3f46', '#b91c1c', '#52525b', '#991b1b', '#7c2d12', '#292524']
+TECH_COLORS_LEN = len(TECH_COLORS)
 
 # Tech Skills Options
 SKILL_OPTIONS = [
@@ -540,10 +549,7 @@ def _make_cookie_controller():
 
 def _get_cookie_secret():
     """Secret used to sign session cookies. Set COOKIE_SECRET, or the OAuth client secret is used."""
-    secret = st.secrets.get("COOKIE_SECRET") if "COOKIE_SECRET" in st.secrets else os.getenv("COOKIE_SECRET")
-    if not secret:
-        secret = st.secrets.get("GOOGLE_CLIENT_SECRET") or os.getenv("GOOGLE_CLIENT_SECRET")
-    return secret
+    return config_value("COOKIE_SECRET") or config_value("GOOGLE_CLIENT_SECRET")
 
 def _sign_session_token(user_info):
     """Builds a tamper-proof session token: base64(payload).hmac_sha256(payload)."""
@@ -579,6 +585,50 @@ def _verify_session_token(token):
     except Exception:
         return None
 
+@st.cache_data(show_spinner=False)
+def login_box_html(client_id, redirect_uri):
+    """The sign-in box markup, Google login link included. Depends only on the
+    OAuth config, so it's built once instead of on every unauthenticated rerun."""
+    auth_url = "https://accounts.google.com/o/oauth2/v2/auth"
+    params = {
+        "client_id": client_id,
+        "redirect_uri": redirect_uri,
+        "response_type": "code",
+        "scope": "openid email profile",
+        "access_type": "online",
+        "prompt": "select_account",
+    }
+    login_url = f"{auth_url}?{urllib.parse.urlencode(params)}"
+
+    _logo_uri = get_logo_data_uri()
+    login_logo_html = f'<img src="{_logo_uri}" style="max-width:220px; margin-bottom:18px;">' if _logo_uri else ''
+
+    return f"""
+        <div class="login-container">
+            <div class="login-box">
+                {login_logo_html}
+                <h1 style="color:white; margin-bottom: 10px;">5G Security Job Board</h1>
+                <p style="color:#a1a1aa; margin-bottom: 30px;">Operational Dashboard</p>
+                <a href="{login_url}" style="
+                    display: inline-block;
+                    background-color: #DB4437;
+                    color: white;
+                    padding: 12px 24px;
+                    text-decoration: none;
+                    border-radius: 6px;
+                    font-weight: bold;
+                    font-family: sans-serif;
+                    box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
+                ">
+                    Sign in with Google
+                </a>
+                <p style="font-size: 0.9em; color: #a1a1aa; margin-top: 20px;">
+                    Please login with your 5G Security email.
+                </p>
+            </div>
+        </div>
+        """
+
 def authenticate():
     """Handles Google OAuth2 Flow. Returns user_info dict if logged in, else None."""
 
@@ -646,13 +696,13 @@ def authenticate():
                 st.rerun()
 
     # 2) Setup OAuth Config
-    client_id = st.secrets.get("GOOGLE_CLIENT_ID") or os.getenv("GOOGLE_CLIENT_ID")
-    client_secret = st.secrets.get("GOOGLE_CLIENT_SECRET") or os.getenv("GOOGLE_CLIENT_SECRET")
+    client_id = config_value("GOOGLE_CLIENT_ID")
+    client_secret = config_value("GOOGLE_CLIENT_SECRET")
     
     # Use APP_URL as fallback for redirect_uri
     app_url = os.getenv("APP_URL", "").rstrip("/")
     default_redirect = f"{app_url}/" if app_url else None
-    redirect_uri = st.secrets.get("GOOGLE_REDIRECT_URI") or os.getenv("GOOGLE_REDIRECT_URI") or default_redirect
+    redirect_uri = config_value("GOOGLE_REDIRECT_URI") or default_redirect
 
     if not (client_id and client_secret and redirect_uri):
         st.error(
@@ -696,12 +746,12 @@ def authenticate():
                 "grant_type": "authorization_code",
             }
 
-            r = requests.post(token_url, data=data, timeout=15)
+            r = get_http_session().post(token_url, data=data, timeout=15)
             r.raise_for_status()
             tokens = r.json()
             access_token = tokens["access_token"]
 
-            user_r = requests.get(
+            user_r = get_http_session().get(
                 "https://www.googleapis.com/oauth2/v1/userinfo",
                 headers={"Authorization": f"Bearer {access_token}"},
                 timeout=15,
@@ -740,46 +790,8 @@ def authenticate():
             code = None
 
     # 4) Show Login Button
-    auth_url = "https://accounts.google.com/o/oauth2/v2/auth"
-    params = {
-        "client_id": client_id,
-        "redirect_uri": redirect_uri,
-        "response_type": "code",
-        "scope": "openid email profile",
-        "access_type": "online",
-        "prompt": "select_account",
-    }
-    login_url = f"{auth_url}?{urllib.parse.urlencode(params)}"
-
-    _logo_uri = get_logo_data_uri()
-    login_logo_html = f'<img src="{_logo_uri}" style="max-width:220px; margin-bottom:18px;">' if _logo_uri else ''
-
     st.markdown(
-        f"""
-        <div class="login-container">
-            <div class="login-box">
-                {login_logo_html}
-                <h1 style="color:white; margin-bottom: 10px;">5G Security Job Board</h1>
-                <p style="color:#a1a1aa; margin-bottom: 30px;">Operational Dashboard</p>
-                <a href="{login_url}" style="
-                    display: inline-block;
-                    background-color: #DB4437;
-                    color: white;
-                    padding: 12px 24px;
-                    text-decoration: none;
-                    border-radius: 6px;
-                    font-weight: bold;
-                    font-family: sans-serif;
-                    box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
-                ">
-                    Sign in with Google
-                </a>
-                <p style="font-size: 0.9em; color: #a1a1aa; margin-top: 20px;">
-                    Please login with your 5G Security email.
-                </p>
-            </div>
-        </div>
-        """,
+        login_box_html(client_id, redirect_uri),
         unsafe_allow_html=True,
     )
 
@@ -886,6 +898,17 @@ def start_background_scheduler():
     except Exception:
         secrets_dict = {}
         
+    # The thread's own pooled connection, reused by the 7 AM summary and the
+    # Friday digests (and across days, NOOP-checked) instead of a fresh login each
+    pools = {}
+
+    def _pool(smtp_server, smtp_port, sender_email, sender_password):
+        cfg = (smtp_server, smtp_port, sender_email, sender_password)
+        if cfg not in pools:
+            pools.clear()
+            pools[cfg] = PooledSMTP(*cfg)
+        return pools[cfg]
+
     def run():
         time.sleep(15)
         while True:
@@ -895,106 +918,107 @@ def start_background_scheduler():
                 if now.weekday() <= 4 and now.hour == 7:
                     today_str = now.strftime("%Y-%m-%d")
                     
-                    from persistence_pg import load_state, save_state_to_db
-                    state, version = load_state()
+                    from persistence_pg import load_state, claim_state_flag, release_state_flag
+                    state, _ = load_state()
                     
-                    if state.get("last_reminder_date") != today_str:
-                        smtp_server = secrets_dict.get("SMTP_SERVER") or os.getenv("SMTP_SERVER")
-                        smtp_port = secrets_dict.get("SMTP_PORT") or os.getenv("SMTP_PORT", 587)
-                        sender_email = secrets_dict.get("SMTP_EMAIL") or os.getenv("SMTP_EMAIL")
-                        sender_password = secrets_dict.get("SMTP_PASSWORD") or os.getenv("SMTP_PASSWORD")
+                    # Claim the day in the DB before sending: every app process runs this
+                    # thread, and only the one whose claim lands sends the summary
+                    previous = state.get("last_reminder_date")
+                    if previous != today_str and claim_state_flag("last_reminder_date", today_str):
+                        try:
+                            smtp_server = secrets_dict.get("SMTP_SERVER") or os.getenv("SMTP_SERVER")
+                            smtp_port = secrets_dict.get("SMTP_PORT") or os.getenv("SMTP_PORT", 587)
+                            sender_email = secrets_dict.get("SMTP_EMAIL") or os.getenv("SMTP_EMAIL")
+                            sender_password = secrets_dict.get("SMTP_PASSWORD") or os.getenv("SMTP_PASSWORD")
                         
-                        if smtp_server and sender_email and sender_password:
-                            import smtplib
-                            from email.mime.text import MIMEText
-                            from email.mime.multipart import MIMEMultipart
-                            
-                            if int(smtp_port) == 465:
-                                server = smtplib.SMTP_SSL(smtp_server, int(smtp_port))
-                                server.ehlo()
-                            else:
-                                server = smtplib.SMTP(smtp_server, int(smtp_port))
-                                server.ehlo()
-                                server.starttls()
-                                server.ehlo()
-                            
-                            server.login(sender_email, sender_password)
-                            
-                            techs = state.get("techs", [])
-                            jobs = state.get("jobs", [])
-                            locations = state.get("locations", [])
-                            recipients = daily_summary_recipients(techs, state.get("adminEmails", []))
-                            active_exists = any(j.get('status') != 'Completed' for j in jobs if j.get('company', 'security') != 'construction')
-
-                            if recipients and active_exists:
-                                subject, plain_body, html_body = build_ops_summary_email(jobs, techs, locations, today_str)
-                                for recipient in recipients:
-                                    try:
-                                        msg = MIMEMultipart("alternative")
-                                        msg['From'] = sender_email
-                                        msg['To'] = recipient
-                                        msg['Subject'] = subject
-                                        msg.attach(MIMEText(plain_body, 'plain'))
-                                        msg.attach(MIMEText(html_body, 'html'))
-                                        server.send_message(msg)
-                                    except Exception:
-                                        continue  # one bad address shouldn't stop the rest
-
-                            server.quit()
-
-                            # Morning push to techs' phones (ntfy) — generic payload,
-                            # topics are only read here (never generated in the thread)
-                            for t in techs:
-                                if (t.get('company', 'security')) == 'construction':
-                                    continue
-                                topic = t.get('notify_topic')
-                                if not topic:
-                                    continue
-                                n_active = len([j for j in jobs
-                                                if j.get('techId') == t.get('id') and j.get('status') != 'Completed'])
-                                if n_active:
-                                    send_push(topic, "Good Morning",
-                                              f"You have {n_active} active job(s) today — check the board for your day.",
-                                              tags=["sunrise"])
-                            
-                        state["last_reminder_date"] = today_str
-                        # Version-guarded so the scheduler can't clobber a save that
-                        # happened between its load and this write (retries next loop)
-                        save_state_to_db(state, expected_version=version)
+                            if smtp_server and sender_email and sender_password:
+                                server = _pool(smtp_server, smtp_port, sender_email, sender_password)
+
+                                techs = state.get("techs", [])
+                                jobs = state.get("jobs", [])
+                                locations = state.get("locations", [])
+                                recipients = daily_summary_recipients(techs, state.get("adminEmails", []))
+                                active_exists = any(j.get('status') != 'Completed' for j in jobs if j.get('company', 'security') != 'construction')
+
+                                if recipients and active_exists:
+                                    subject, plain_body, html_body = build_ops_summary_email(jobs, techs, locations, today_str)
+                                    sent, last_err = 0, None
+                                    for recipient in recipients:
+                                        try:
+                                            msg = MIMEMultipart("alternative")
+                                            msg['From'] = sender_email
+                                            msg['To'] = recipient
+                                            msg['Subject'] = subject
+                                            msg.attach(MIMEText(plain_body, 'plain'))
+                                            msg.attach(MIMEText(html_body, 'html'))
+                                            server.send_message(msg)
+                                            sent += 1
+                                        except Exception as e:
+                                            last_err = e
+                                            continue  # one bad address shouldn't stop the rest
+                                    if not sent:
+                                        # Server unreachable / login failed: leave the day
+                                        # unmarked so the next loop tries again
+                                        raise last_err
+
+                                # Morning push to techs' phones (ntfy) — generic payload,
+                                # topics are only read here (never generated in the thread)
+                                active_by_tech = collections.Counter(
+                                    j.get('techId') for j in jobs if j.get('status') != 'Completed')
+                                for t in techs:
+                                    if (t.get('company', 'security')) == 'construction':
+                                        continue
+                                    topic = t.get('notify_topic')
+                                    if not topic:
+                                        continue
+                                    n_active = active_by_tech[t.get('id')]
+                                    if n_active:
+                                        send_push(topic, "Good Morning",
+                                                  f"You have {n_active} active job(s) today — check the board for your day.",
+                                                  tags=["sunrise"])
+                        except Exception:
+                            # Nothing went out: hand the day back so the next loop retries
+                            release_state_flag("last_reminder_date", today_str, previous)
+                            raise
                         get_logger().log(f"Sent 7 AM background reminders for {today_str}")
 
                 # Friday 4 PM: weekly hours digest to admins (CSV attached)
                 if now.weekday() == 4 and now.hour == 16:
-                    from persistence_pg import load_state, save_state_to_db
-                    state, version = load_state()
+                    from persistence_pg import load_state, claim_state_flag, release_state_flag
+                    state, _ = load_state()
                     today_str = now.strftime("%Y-%m-%d")
 
-                    if state.get("last_hours_digest_date") != today_str:
-                        smtp_server = secrets_dict.get("SMTP_SERVER") or os.getenv("SMTP_SERVER")
-                        smtp_port = secrets_dict.get("SMTP_PORT") or os.getenv("SMTP_PORT", 587)
-                        sender_email = secrets_dict.get("SMTP_EMAIL") or os.getenv("SMTP_EMAIL")
-                        sender_password = secrets_dict.get("SMTP_PASSWORD") or os.getenv("SMTP_PASSWORD")
-
-                        end_d = now.date()
-                        start_d = end_d - datetime.timedelta(days=6)
-                        admin_emails = state.get("adminEmails", [])
-                        constr_emails = state.get("construction_emails", [])
-                        jobs = state.get("jobs", [])
-                        techs = state.get("techs", [])
-                        locations = state.get("locations", [])
-
-                        # Security hours digest -> admins only
-                        _send_hours_digest_email('security', 'Security', admin_emails,
-                                                 smtp_server, smtp_port, sender_email, sender_password,
-                                                 jobs, techs, locations, start_d, end_d)
-                        # Construction hours digest -> construction leads + admins
-                        _send_hours_digest_email('construction', 'Construction', list(constr_emails) + list(admin_emails),
-                                                 smtp_server, smtp_port, sender_email, sender_password,
-                                                 jobs, techs, locations, start_d, end_d)
+                    previous = state.get("last_hours_digest_date")
+                    if previous != today_str and claim_state_flag("last_hours_digest_date", today_str):
+                        try:
+                            smtp_server = secrets_dict.get("SMTP_SERVER") or os.getenv("SMTP_SERVER")
+                            smtp_port = secrets_dict.get("SMTP_PORT") or os.getenv("SMTP_PORT", 587)
+                            sender_email = secrets_dict.get("SMTP_EMAIL") or os.getenv("SMTP_EMAIL")
+                            sender_password = secrets_dict.get("SMTP_PASSWORD") or os.getenv("SMTP_PASSWORD")
+
+                            end_d = now.date()
+                            start_d = end_d - datetime.timedelta(days=6)
+                            admin_emails = state.get("adminEmails", [])
+                            constr_emails = state.get("construction_emails", [])
+                            jobs = state.get("jobs", [])
+                            techs = state.get("techs", [])
+                            locations = state.get("locations", [])
 
+                            smtp = (_pool(smtp_server, smtp_port, sender_email, sender_password)
+                                    if smtp_server and sender_email and sender_password else None)
+
+                            # Security hours digest -> admins only
+                            _send_hours_digest_email('security', 'Security', admin_emails, smtp, sender_email,
+                                                     jobs, techs, locations, start_d, end_d)
+                            # Construction hours digest -> construction leads + admins
+                            _send_hours_digest_email('construction', 'Construction', list(constr_emails) + list(admin_emails),
+                                                     smtp, sender_email, jobs, techs, locations, start_d, end_d)
+                        except Exception:
+                            # Hand the week back so the next loop retries (as when the date
+                            # was only marked after sending)
+                            release_state_flag("last_hours_digest_date", today_str, previous)
+                            raise
                         get_logger().log(f"Sent weekly hours digests for {start_d} to {end_d}")
-                        state["last_hours_digest_date"] = today_str
-                        save_state_to_db(state, expected_version=version)
             except Exception as e:
                 get_logger().log(f"Background reminder error: {e}")
             
@@ -1008,11 +1032,82 @@ def start_background_scheduler():
     thread = threading.Thread(target=run, name=thread_name, daemon=True)
     thread.start()
 
+def _id_index(items, cache_key):
+    """id -> record dict for a session list, cached in session_state and rebuilt
+    only when the list is replaced or changes length. Other fields are edited
+    in place, which the index survives; code that rewrites a record's 'id' in
+    place must pop cache_key itself. Holding the list itself avoids id() reuse
+    after a reload swaps it out."""
+    cached = st.session_state.get(cache_key)
+    if cached is None or cached[0] is not items or cached[1] != len(items):
+        # reversed() so the first record wins on duplicate ids, matching next(...)
+        cached = (items, len(items), {x['id']: x for x in reversed(items)})
+        st.session_state[cache_key] = cached
+    return cached[2]
+
 def get_tech(tech_id):
-    return next((t for t in st.session_state.techs if t['id'] == tech_id), None)
+    return _id_index(st.session_state.techs, '_techs_by_id').get(tech_id)
 
 def get_location(loc_id):
-    return next((l for l in st.session_state.locations if l['id'] == loc_id), None)
+    return _id_index(st.session_state.locations, '_locations_by_id').get(loc_id)
+
+def get_job(job_id):
+    return _id_index(st.session_state.jobs, '_jobs_by_id').get(job_id)
+
+def get_job_index(job_id):
+    """Position of the job in st.session_state.jobs, or -1. Positions shift when
+    jobs are added or removed, so a cached hit is checked against the list and
+    the id -> position map is rebuilt whenever it no longer matches."""
+    jobs = st.session_state.jobs
+    cached = st.session_state.get('_job_positions')
+    if cached is not None and cached[0] is jobs:
+        idx = cached[1].get(job_id)
+        if idx is not None and idx < len(jobs) and jobs[idx]['id'] == job_id:
+            return idx
+    positions = {}
+    for i, j in enumerate(jobs):
+        positions.setdefault(j['id'], i)  # first wins on duplicate ids, like next(...)
+    st.session_state._job_positions = (jobs, positions)
+    return positions.get(job_id, -1)
+
+def get_tech_by_email(email):
+    """First tech whose email matches (case-insensitive), or None. Emails can be
+    edited in place, so unlike _id_index this is also keyed on the DB version -
+    every edit is saved, and the save bumps it."""
+    if not email:
+        return None
+    techs = st.session_state.techs
+    key = (len(techs), synced_db_version())
+    cached = st.session_state.get('_techs_by_email')
+    # A None version (no DB, or a failed save) can't tell edits apart: rebuild
+    if cached is None or cached[0] is not techs or cached[1] != key or key[1] is None:
+        index = {}
+        for t in techs:
+            index.setdefault((t.get('email') or '').lower(), t)
+        cached = (techs, key, index)
+        st.session_state._techs_by_email = cached
+    return cached[2].get(email.lower())
+
+def job_search_haystacks():
+    """job id -> lowercased title/description/site/tech text for the search
+    boxes, built once per DB version instead of lowercasing every field of every
+    job on each keystroke. Keyed like get_tech_by_email: any edit to a job, site
+    or tech is saved, and the save bumps the version."""
+    jobs = st.session_state.jobs
+    key = (len(jobs), synced_db_version())
+    cached = st.session_state.get('_job_search_hay')
+    if cached is None or cached[0] is not jobs or cached[1] != key or key[1] is None:
+        index = {}
+        for j in jobs:
+            loc = get_location(j.get('locationId')) or {}
+            tech = get_tech(j.get('techId')) or {}
+            # newline-joined so a query can't match across two fields
+            index[j['id']] = "\n".join(str(x) for x in (
+                j.get('title', ''), j.get('description', ''), loc.get('name', ''),
+                loc.get('address', ''), tech.get('name', ''))).lower()
+        cached = (jobs, key, index)
+        st.session_state._job_search_hay = cached
+    return cached[2]
 
 # --- COMPANY (multi-company support: 5G Security + 5G Construction) ---
 def job_company(j):
@@ -1028,6 +1123,24 @@ def company_jobs(company):
 def company_techs(company):
     return [t for t in st.session_state.techs if tech_company(t) == company]
 
+def tech_picker_labels(company):
+    """tech id -> "Name (skill, skill..)" for the company's crew, then
+    None -> "Unassigned": the options of the job dialogs' Assign Tech pickers.
+    Keyed like get_tech_by_email, so it's rebuilt only after a save."""
+    techs = st.session_state.techs
+    key = (len(techs), synced_db_version())
+    cache = st.session_state.setdefault('_tech_picker_labels', {})
+    cached = cache.get(company)
+    if cached is None or cached[0] is not techs or cached[1] != key or key[1] is None:
+        labels = {}
+        for t in company_techs(company):
+            skills_str = f" ({', '.join(t.get('skills', [])[:2])}..)" if t.get('skills') else ""
+            labels[t['id']] = f"{t['name']}{skills_str}"
+        labels[None] = "Unassigned"
+        cached = (techs, key, labels)
+        cache[company] = cached
+    return cached[2]
+
 def get_user_construction_role(user_email):
     """Returns 'manager' (construction lead/admin), 'crew' (construction tech),
     or None for the given email. Security admins are handled separately."""
@@ -1036,7 +1149,7 @@ def get_user_construction_role(user_email):
     email_l = user_email.lower()
     if email_l in [e.lower() for e in st.session_state.get('construction_emails', [])]:
         return 'manager'
-    t = next((t for t in st.session_state.techs if (t.get('email') or '').lower() == email_l), None)
+    t = get_tech_by_email(email_l)
     if t and tech_company(t) == 'construction':
         return 'crew'
     return None
@@ -1069,19 +1182,16 @@ def get_job_stale_days(job):
     Returns None for completed jobs, future-scheduled jobs, or unparseable dates."""
     if job.get('status') == 'Completed':
         return None
-    last_ts = None
-    for r in job.get('reports', []):
-        ts = r.get('timestamp', '')
-        if ts and (last_ts is None or ts > last_ts):
-            last_ts = ts
+    last_ts = max((r.get('timestamp') or '' for r in job.get('reports', [])), default='')
     base = last_ts or job.get('date', '')
     try:
         base_dt = datetime.datetime.fromisoformat(base[:19])
     except (ValueError, TypeError):
         return None
-    if base_dt > now_local():
+    now = now_local()
+    if base_dt > now:
         return None
-    return (now_local() - base_dt).days
+    return (now - base_dt).days
 
 def compute_hours_rows(jobs, techs, locations, start_date, end_date):
     """Flattens logged hours from job reports into rows for the Hours Report / weekly digest.
@@ -1142,37 +1252,63 @@ def resolve_image_source(photo_source: str):
     return photo_source
 
 
+# Longest edge for stored job photos. They're viewed in a 4-up grid and on
+# letter-size PDFs, so anything beyond this is just upload and egress weight.
+PHOTO_MAX_DIM = 1280
+
+def photo_key(data, ext="jpg"):
+    """Content-addressed object key: the same photo always maps to the same key
+    (re-attaching it doesn't store a second copy), and two different photos
+    taken in the same second can no longer overwrite each other."""
+    return f"photos/{hashlib.sha256(data).hexdigest()}.{ext}"
+
+def compress_photo(img):
+    """Returns JPEG bytes for a PIL image: EXIF-rotated, RGB, at most
+    PHOTO_MAX_DIM px on the long side, quality 80."""
+    # For JPEGs, have libjpeg decode at a reduced scale (1/2, 1/4, 1/8) that still
+    # covers PHOTO_MAX_DIM - a 12 MP phone photo never gets fully decoded
+    if img.format == 'JPEG':
+        img.draft('RGB', (PHOTO_MAX_DIM, PHOTO_MAX_DIM))
+    # Apply EXIF rotation so phone photos don't end up sideways after re-encoding
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ("RGBA", "P", "LA"):
+        img = img.convert("RGB")
+
+    if img.width > PHOTO_MAX_DIM or img.height > PHOTO_MAX_DIM:
+        img.thumbnail((PHOTO_MAX_DIM, PHOTO_MAX_DIM), Image.Resampling.LANCZOS)
+
+    buf = io.BytesIO()
+    img.save(buf, format='JPEG', quality=80, optimize=True, progressive=True)
+    return buf.getvalue()
+
 def save_image_locally(uploaded_file):
     """Uploads an uploaded file/camera input to R2 and returns the object key.
-    Images are compressed first (max 1600px, JPEG q80) so uploads are fast on cell data.
+    Images are compressed first (max PHOTO_MAX_DIM px, JPEG q80) so uploads are fast on cell data;
+    small JPEGs already within that size are uploaded untouched.
     PDFs and other non-image files pass through unchanged."""
     if uploaded_file is None:
         return None
 
     file_type = getattr(uploaded_file, 'type', '') or ''
-    file_name = getattr(uploaded_file, 'name', 'photo.jpg') or 'photo.jpg'
 
     if not file_type.startswith('image/'):
         return upload_streamlit_file(uploaded_file, folder="photos")
 
     try:
         img = Image.open(uploaded_file)
-        # Apply EXIF rotation so phone photos don't end up sideways after re-encoding
-        img = ImageOps.exif_transpose(img)
-        if img.mode in ("RGBA", "P"):
-            img = img.convert("RGB")
-
-        max_size = 1600
-        if img.width > max_size or img.height > max_size:
-            img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-
-        buf = io.BytesIO()
-        img.save(buf, format='JPEG', quality=80, optimize=True)
-
-        timestamp = now_local().strftime("%Y%m%d_%H%M%S")
-        base_name = file_name.rsplit('.', 1)[0] or 'photo'
-        key = f"photos/{timestamp}_{base_name}.jpg"
-        return upload_bytes(buf.getvalue(), key, content_type="image/jpeg")
+
+        # Already-small, upright JPEGs go up as-is. Image.open only reads the
+        # header, so this skips the full decode + re-encode for them.
+        raw = uploaded_file.getvalue()
+        if (img.format == 'JPEG' and len(raw) <= 500_000
+                and img.width <= PHOTO_MAX_DIM and img.height <= PHOTO_MAX_DIM
+                and img.getexif().get(0x0112, 1) == 1):
+            return upload_bytes(raw, photo_key(raw), content_type="image/jpeg",
+                                cache_control=IMMUTABLE_CACHE_CONTROL)
+
+        data = compress_photo(img)
+        return upload_bytes(data, photo_key(data), content_type="image/jpeg",
+                            cache_control=IMMUTABLE_CACHE_CONTROL)
     except Exception:
         # Compression failed (corrupt/unsupported image) - upload the original instead
         try:
@@ -1181,6 +1317,38 @@ def save_image_locally(uploaded_file):
             pass
         return upload_streamlit_file(uploaded_file, folder="photos")
 
+def migrate_inline_photos(jobs):
+    """One-time migration for reports saved before photos moved to R2: any
+    photo still stored inline as a base64 data URI is uploaded and replaced by
+    its object key, so the state row stops carrying megabytes of image text on
+    every save. Legacy photos were stored full-size, so images are put through
+    compress_photo on the way out. Returns the number of photos moved."""
+    moved = 0
+    for job in jobs:
+        for r in job.get('reports') or []:
+            photos = r.get('photos') or []
+            for p_idx, src in enumerate(photos):
+                if not (isinstance(src, str) and src.startswith("data:image") and ";base64," in src):
+                    continue
+                header, b64 = src.split(";base64,", 1)
+                content_type = header[len("data:"):] or "image/jpeg"
+                ext = content_type.split("/")[-1].split("+")[0] or "jpg"
+                try:
+                    raw = base64.b64decode(b64)
+                except Exception:
+                    continue
+                try:
+                    raw = compress_photo(Image.open(io.BytesIO(raw)))
+                    content_type, ext = "image/jpeg", "jpg"
+                except Exception:
+                    pass  # not decodable as an image - move the original bytes
+                key = upload_bytes(raw, photo_key(raw, ext), content_type=content_type,
+                                   cache_control=IMMUTABLE_CACHE_CONTROL)
+                if key:
+                    photos[p_idx] = key
+                    moved += 1
+    return moved
+
 def save_document_locally(uploaded_file):
     """Uploads an uploaded file (PDF/etc) to R2 and returns the object key."""
     return upload_streamlit_file(uploaded_file, folder="docs")
@@ -1192,17 +1360,29 @@ def get_google_maps_url(address):
 
 def get_api_key():
     # Try getting from Streamlit secrets, then Env, then return None
-    if "GEMINI_API_KEY" in st.secrets:
-        return st.secrets["GEMINI_API_KEY"]
-    return os.getenv("GEMINI_API_KEY") or os.getenv("API_KEY")
+    return config_value("GEMINI_API_KEY") or os.getenv("API_KEY")
 
-@st.cache_resource
 def get_available_model(api_key):
     """
     Dynamically lists models available to the API key and returns the client and best model name.
     Prefers current stable Flash models. (Google retired the Gemini 1.x family -
     the old hardcoded 1.5 names now 404.)
+    Successful discovery is cached for the life of the process; a failed listing
+    falls back to gemini-flash-latest for this call only, so a transient API
+    error doesn't pin the fallback model until the next restart.
     """
+    try:
+        return _discover_model(api_key)
+    except Exception as e:
+        get_logger().log(f"Error listing models: {e}. Defaulting to gemini-flash-latest.")
+        from google import genai
+        return genai.Client(api_key=api_key), 'gemini-flash-latest'
+
+@st.cache_resource(show_spinner=False)
+def _discover_model(api_key):
+    # Imported here, not at module level: google-genai pulls in httpx/pydantic
+    # and is only needed once someone actually uses an AI feature.
+    from google import genai
     client = genai.Client(api_key=api_key)
     logger = get_logger()
 
@@ -1211,60 +1391,90 @@ def get_available_model(api_key):
         # 'supported_generation_methods'. Check both so the filter actually works.
         return getattr(m, 'supported_actions', None) or getattr(m, 'supported_generation_methods', None)
 
-    try:
-        all_models = list(client.models.list())
-        logger.log(f"Discovery: Found {len(all_models)} available models.")
-
-        # Text-capable Gemini models only - specialty variants (TTS, image,
-        # live audio, embeddings) reject plain generate_content calls.
-        EXCLUDE = ('tts', 'image', 'audio', 'live', 'embed', 'veo', 'imagen', 'aqa')
-        candidates = []
-        for m in all_models:
-            lname = m.name.lower()
-            if 'gemini' not in lname:
-                continue
-            if any(x in lname for x in EXCLUDE):
-                continue
-            actions = _gen_actions(m)
-            if actions and not ('generateContent' in actions or 'generate_content' in actions):
-                continue
-            candidates.append(m)
-
-        # Preference order: newest stable Flash -> rolling alias -> 2.0 Flash -> Pro -> any Flash
-        preferences = ['gemini-2.5-flash', 'gemini-flash-latest', 'gemini-2.0-flash', 'gemini-2.5-pro', 'flash']
-
-        # Pass 1: exact model names
-        for pref in preferences:
-            best = next((m for m in candidates if m.name.lower().split('/')[-1] == pref), None)
-            if best:
-                logger.log(f"Using Gemini model: {best.name}")
-                return client, best.name
-
-        # Pass 2: substring match, preferring stable over preview/experimental builds
-        for pref in preferences:
-            best = next((m for m in candidates if pref in m.name.lower() and 'preview' not in m.name.lower() and 'exp' not in m.name.lower()), None)
-            if not best:
-                best = next((m for m in candidates if pref in m.name.lower()), None)
-            if best:
-                logger.log(f"Using Gemini model: {best.name}")
-                return client, best.name
-
-        if candidates:
-            logger.log(f"Using first available Gemini model: {candidates[0].name}")
-            return client, candidates[0].name
-
-        logger.log("No usable Gemini models found via listing. Defaulting to gemini-flash-latest.")
-        return client, 'gemini-flash-latest'
+    all_models = list(client.models.list())
+    logger.log(f"Discovery: Found {len(all_models)} available models.")
 
-    except Exception as e:
-        logger.log(f"Error listing models: {e}. Defaulting to gemini-flash-latest.")
-        return client, 'gemini-flash-latest'
+    # Text-capable Gemini models only - specialty variants (TTS, image,
+    # live audio, embeddings) reject plain generate_content calls.
+    EXCLUDE = ('tts', 'image', 'audio', 'live', 'embed', 'veo', 'imagen', 'aqa')
+    candidates = []
+    for m in all_models:
+        lname = m.name.lower()
+        if 'gemini' not in lname:
+            continue
+        if any(x in lname for x in EXCLUDE):
+            continue
+        actions = _gen_actions(m)
+        if actions and not ('generateContent' in actions or 'generate_content' in actions):
+            continue
+        candidates.append(m)
+
+    # Preference order: newest stable Flash -> rolling alias -> 2.0 Flash -> Pro -> any Flash
+    preferences = ['gemini-2.5-flash', 'gemini-flash-latest', 'gemini-2.0-flash', 'gemini-2.5-pro', 'flash']
+
+    # One scoring pass instead of a next() scan per preference. Lowest wins:
+    # exact names first, then substring matches (stable before preview/exp),
+    # then anything else; list order breaks ties.
+    def _score(pos, m):
+        lname = m.name.lower()
+        short = lname.split('/')[-1]
+        if short in preferences:
+            return (0, preferences.index(short), 0, pos)
+        rank = next((i for i, pref in enumerate(preferences) if pref in lname), None)
+        if rank is not None:
+            return (1, rank, int('preview' in lname or 'exp' in lname), pos)
+        return (2, 0, 0, pos)
+
+    if candidates:
+        best = min(enumerate(candidates), key=lambda pm: _score(*pm))[1]
+        logger.log(f"Using Gemini model: {best.name}")
+        return client, best.name
+
+    logger.log("No usable Gemini models found via listing. Defaulting to gemini-flash-latest.")
+    return client, 'gemini-flash-latest'
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def generate_text_cached(_client, model_name, prompt):
+    """generate_content() memoized on (model, prompt). Identical prompts - the
+    parts analysis re-run on unchanged reports, the same address typed again -
+    are answered from cache instead of paying Gemini latency and quota again.
+    Errors aren't cached, so rate-limit failures still retry."""
+    response = _client.models.generate_content(model=model_name, contents=prompt)
+    return response.text
+
+def stream_text(client, model_name, prompt):
+    """Yields response text as Gemini produces it, for st.write_stream - the
+    user sees the first words in well under a second instead of waiting on
+    the full completion."""
+    for chunk in client.models.generate_content_stream(model=model_name, contents=prompt):
+        if chunk.text:
+            yield chunk.text
 
 def generate_technician_summary(notes, job_title):
     """Uses Gemini to summarize the daily work for the PDF Report."""
     api_key = get_api_key()
     if not api_key: return None
     client, model_name = get_available_model(api_key)
+    return _summarize_notes(client, model_name, notes, job_title)
+
+@st.cache_resource(show_spinner=False)
+def get_ai_executor():
+    """Small shared pool for model calls started ahead of need (see
+    prefetch_technician_summary)."""
+    return concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="ai_prefetch")
+
+def prefetch_technician_summary(notes, job_title):
+    """Submits _summarize_notes() (the model call behind
+    generate_technician_summary) to the AI executor and returns the Future
+    (None without an API key). The client and model are resolved here, on the
+    script thread; the worker only makes the HTTP call."""
+    api_key = get_api_key()
+    if not api_key:
+        return None
+    client, model_name = get_available_model(api_key)
+    return get_ai_executor().submit(_summarize_notes, client, model_name, notes, job_title)
+
+def _summarize_notes(client, model_name, notes, job_title):
     prompt = f"Summarize the following technician notes for job '{job_title}' into a concise, professional paragraph (approx 50 words) suitable for a client report:\n\n{notes}"
     try:
         response = client.models.generate_content(model=model_name, contents=prompt)
@@ -1278,6 +1488,7 @@ def transcribe_audio(audio_file):
     if not api_key: return None
     
     client, model_name = get_available_model(api_key)
+    from google.genai import types
     
     try:
         audio_bytes = audio_file.read()
@@ -1316,9 +1527,10 @@ Location:
 Details:
 {job['description']}
 """
-    # Use quote_via=quote to ensure spaces are encoded correctly for mail clients
-    qs = urllib.parse.urlencode({'subject': subject, 'body': body}, quote_via=urllib.parse.quote)
-    return f"mailto:{tech['email']}?{qs}"
+    # quote (not quote_plus) so spaces come out as %20 for mail clients; safe=''
+    # matches what urlencode passed it, so '/' is escaped too
+    quote = urllib.parse.quote
+    return f"mailto:{tech['email']}?subject={quote(subject, safe='')}&body={quote(body, safe='')}"
 
 def suggest_address_with_gemini(partial_address):
     """Uses Gemini to autocomplete/validate an address."""
@@ -1327,15 +1539,32 @@ def suggest_address_with_gemini(partial_address):
     client, model_name = get_available_model(api_key)
     prompt = f"You are an address autocomplete tool. The user typed: '{partial_address}'. Return the most likely full address. If ambiguous, return the best guess. Return ONLY the address text, no other words."
     try:
-        response = client.models.generate_content(model=model_name, contents=prompt)
-        return response.text.strip()
+        return generate_text_cached(client, model_name, prompt).strip()
     except:
         return partial_address
 
-@st.cache_data(ttl=3600) # Cache for 1 hour
+GEOCODE_WORKERS = 4
+# An address that didn't geocode isn't retried for this long (the old hourly cache)
+GEOCODE_RETRY_SECONDS = 3600
+
+@st.cache_resource(show_spinner=False)
+def geocode_failures():
+    """address -> time of its last failed geocode, shared by all sessions, so the
+    map's uncached worker-pool lookups don't re-request bad addresses on every
+    rerun. Successes need no entry - they're persisted on the location."""
+    return {}
+
+@st.cache_data(ttl=30 * 24 * 3600, max_entries=1000, show_spinner=False)
 def get_lat_lon_from_address(address):
+    """geocode_address(), cached. Addresses rarely move, so results are kept
+    for 30 days (and callers persist them on the location as well)."""
+    return geocode_address(address, get_http_session())
+
+def geocode_address(address, http=None):
     """Uses Open-Meteo Geocoding API to geocode an address to Lat/Lon.
        Falls back to city search if full address fails.
+       Uncached and Streamlit-free, so it can run in worker threads
+       (pass get_http_session() as http to reuse its connections).
     """
     try:
         # Helper to query Open-Meteo
@@ -1345,7 +1574,7 @@ def get_lat_lon_from_address(address):
             url = f"https://geocoding-api.open-meteo.com/v1/search?name={encoded_query}&count=1&language=en&format=json"
             headers = {'User-Agent': '5GSecurityJobBoard/1.0'}
             try:
-                response = requests.get(url, headers=headers, timeout=5)
+                response = (http or requests).get(url, headers=headers, timeout=5)
                 return response.json()
             except:
                 return {}
@@ -1389,7 +1618,7 @@ def get_weather(lat, lon):
 
         url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,weather_code&temperature_unit=fahrenheit&timezone=auto"
         headers = {'User-Agent': '5GSecurityJobBoard/1.0'}
-        r = requests.get(url, headers=headers, timeout=3)
+        r = get_http_session().get(url, headers=headers, timeout=3)
         
         if r.status_code != 200:
             return None
@@ -1473,6 +1702,7 @@ END:VCALENDAR"""
         return None
 
 def download_data_as_csv():
+    import pandas as pd
     # Convert jobs to CSV
     if st.session_state.jobs:
         df = pd.DataFrame(st.session_state.jobs)
@@ -1491,37 +1721,108 @@ def download_data_as_json():
         "agreements": st.session_state.get("agreements", []),
         "last_reminder_date": st.session_state.get("last_reminder_date")
     }
-    return json.dumps(data, indent=2)
+    version = synced_db_version()
+    if version is None:
+        return dumps_state(data)
+    return _backup_json(version, data)
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _backup_json(version, _data):
+    """Serializes the backup once per saved DB version. The Admin tab renders
+    on every admin rerun, and every mutation saves (bumping the version), so
+    the version alone identifies the content. Compact separators: the backup
+    is for restoring, not reading, and indenting roughly doubles its size."""
+    return dumps_state(_data)
 
 # --- PDF GENERATION ---
-@st.cache_data(ttl=3600, show_spinner=False)
-def get_image_bytes(url):
-    """Fetches image bytes from a URL and caches them."""
+def fetch_url_bytes(url, http=None):
+    """Fetches bytes from a URL (None on failure). Uncached and Streamlit-free,
+    so it can run in worker threads; pass get_http_session() as http."""
     try:
-        response = requests.get(url, timeout=15)
+        response = (http or requests).get(url, timeout=15)
         if response.status_code == 200:
             return response.content
     except Exception:
         pass
     return None
 
-@st.cache_data(show_spinner="Generating PDF...")
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_image_bytes(url):
+    """Fetches image bytes from a URL and caches them."""
+    return fetch_url_bytes(url, get_http_session())
+
+@functools.lru_cache(maxsize=1)
+def _pdf_styles():
+    """Brand palette and paragraph styles for generate_job_pdf. Built once per
+    process - getSampleStyleSheet() and the derived styles don't change."""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+    # Brand palette (mirrors the app theme)
+    pal = {
+        "BRAND_RED": colors.HexColor("#b91c1c"),
+        "BRAND_DARK": colors.HexColor("#18181b"),
+        "INK": colors.HexColor("#27272a"),
+        "MUTED": colors.HexColor("#71717a"),
+        "LIGHT": colors.HexColor("#f4f4f5"),
+        "BORDER": colors.HexColor("#e4e4e7"),
+    }
+    styles = getSampleStyleSheet()
+    sty = {}
+    sty["title"] = ParagraphStyle('JobTitle', parent=styles['Heading1'], fontName="Helvetica-Bold",
+                                  fontSize=16, textColor=pal["INK"], spaceAfter=2)
+    sty["sub"] = ParagraphStyle('Sub', parent=styles['Normal'], fontSize=10, textColor=pal["MUTED"], spaceAfter=4)
+    sty["section"] = ParagraphStyle('Section', parent=styles['Heading2'], fontName="Helvetica-Bold",
+                                    fontSize=11, textColor=pal["BRAND_RED"], spaceBefore=16, spaceAfter=6)
+    sty["body"] = ParagraphStyle('Body', parent=styles['Normal'], fontName="Helvetica",
+                                 fontSize=9.5, leading=14, textColor=pal["INK"])
+    sty["label"] = ParagraphStyle('Label', parent=sty["body"], textColor=pal["MUTED"], fontSize=8)
+    sty["value"] = ParagraphStyle('Value', parent=sty["body"], fontName="Helvetica-Bold")
+    sty["italic"] = ParagraphStyle('Ital', parent=sty["body"], fontName="Helvetica-Oblique")
+    sty["caption"] = ParagraphStyle('Caption', parent=sty["label"], fontSize=7.5, spaceBefore=2)
+    return pal, sty
+
 def generate_job_pdf(job, tech, location, report):
+    """Cached front for render_job_pdf. Keyed on the job id and report
+    timestamp plus the few header fields that appear on the page, rather than
+    hashing the whole job (every report, every photo key) on each call. The
+    report's own digest rides along so an edited entry re-renders. The email
+    worker and the Details download share the cached bytes."""
+    key = (
+        job.get('id'), report.get('id'), report.get('timestamp'),
+        hashlib.sha1(json.dumps(report, sort_keys=True, default=str).encode()).hexdigest(),
+        job.get('status'), job.get('title'), job.get('type'), job.get('priority'), str(job.get('date', ''))[:10],
+        tech['name'] if tech else None,
+        (location['name'], location['address']) if location else None,
+    )
+    return _job_pdf_for(key, job, tech, location, report)
+
+@st.cache_data(show_spinner="Generating PDF...", max_entries=32)
+def _job_pdf_for(key, _job, _tech, _location, _report):
+    return render_job_pdf(_job, _tech, _location, _report)
+
+# Concurrent photo downloads per PDF
+PDF_PHOTO_WORKERS = 4
+
+def render_job_pdf(job, tech, location, report):
     """Generates a styled PDF report for a job (completion or daily field report)."""
     if not HAS_REPORTLAB:
         return None
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib import colors
+    from reportlab.lib.utils import ImageReader
+    from reportlab.platypus import (
+        SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
+        Image as RLImage, KeepTogether, PageBreak,
+    )
 
     is_completion = 'completion_checklist' in report
     report_type = "Job Completion Report" if is_completion else "Daily Field Report"
     generated_str = now_local().strftime('%B %d, %Y at %I:%M %p')
 
-    # Brand palette (mirrors the app theme)
-    BRAND_RED = colors.HexColor("#b91c1c")
-    BRAND_DARK = colors.HexColor("#18181b")
-    INK = colors.HexColor("#27272a")
-    MUTED = colors.HexColor("#71717a")
-    LIGHT = colors.HexColor("#f4f4f5")
-    BORDER = colors.HexColor("#e4e4e7")
+    pal, pstyles = _pdf_styles()
+    BRAND_RED, BRAND_DARK = pal["BRAND_RED"], pal["BRAND_DARK"]
+    MUTED, LIGHT, BORDER = pal["MUTED"], pal["LIGHT"], pal["BORDER"]
 
     def esc(s):
         """Escape text for ReportLab Paragraph markup."""
@@ -1564,18 +1865,9 @@ def generate_job_pdf(job, tech, location, report):
         canv.drawRightString(w - 46, 34, f"Page {canv.getPageNumber()}")
         canv.restoreState()
 
-    styles = getSampleStyleSheet()
-    s_title = ParagraphStyle('JobTitle', parent=styles['Heading1'], fontName="Helvetica-Bold",
-                             fontSize=16, textColor=INK, spaceAfter=2)
-    s_sub = ParagraphStyle('Sub', parent=styles['Normal'], fontSize=10, textColor=MUTED, spaceAfter=4)
-    s_section = ParagraphStyle('Section', parent=styles['Heading2'], fontName="Helvetica-Bold",
-                               fontSize=11, textColor=BRAND_RED, spaceBefore=16, spaceAfter=6)
-    s_body = ParagraphStyle('Body', parent=styles['Normal'], fontName="Helvetica",
-                            fontSize=9.5, leading=14, textColor=INK)
-    s_label = ParagraphStyle('Label', parent=s_body, textColor=MUTED, fontSize=8)
-    s_value = ParagraphStyle('Value', parent=s_body, fontName="Helvetica-Bold")
-    s_italic = ParagraphStyle('Ital', parent=s_body, fontName="Helvetica-Oblique")
-    s_caption = ParagraphStyle('Caption', parent=s_label, fontSize=7.5, spaceBefore=2)
+    s_title, s_sub, s_section = pstyles["title"], pstyles["sub"], pstyles["section"]
+    s_body, s_label, s_value = pstyles["body"], pstyles["label"], pstyles["value"]
+    s_italic, s_caption = pstyles["italic"], pstyles["caption"]
 
     avail = letter[0] - 92  # usable width inside margins
 
@@ -1680,29 +1972,39 @@ def generate_job_pdf(job, tech, location, report):
             pass
 
     # Site photos (own page, two per row)
-    photos = report.get("photos", [])
+    photos = list(dict.fromkeys(report.get("photos", [])))  # dedup, keep order
     if photos:
+        # Downloads run in parallel (URLs are signed here - that goes through
+        # Streamlit caches); the photos are then shrunk to twice their printed
+        # size (~150 dpi) - anything more is dead weight in the PDF
+        cell_w, cell_h = (avail / 2) - 16, 190
+        px_w, px_h = int(cell_w * 2), int(cell_h * 2)
+        urls = []
+        for key in photos:
+            try:
+                urls.append(get_view_url(key, expires_seconds=3600))
+            except Exception:
+                continue
+        fetch = functools.partial(fetch_url_bytes, http=get_http_session())
+        with concurrent.futures.ThreadPoolExecutor(max_workers=PDF_PHOTO_WORKERS) as ex:
+            photo_bytes = list(ex.map(fetch, [u for u in urls if u]))
+
         photo_flowables = []
-        seen_keys = set()
-        for photo_key in photos:
-            if photo_key in seen_keys:
+        for img_bytes in photo_bytes:
+            if not img_bytes:
                 continue
-            seen_keys.add(photo_key)
             try:
-                photo_url = get_view_url(photo_key, expires_seconds=3600)
-                img_bytes = get_image_bytes(photo_url)
-                if not img_bytes:
-                    continue
                 img = Image.open(BytesIO(img_bytes))
+                if img.format == 'JPEG':
+                    img.draft('RGB', (px_w, px_h))
                 if img.mode in ("RGBA", "P"):
                     img = img.convert("RGB")
-                if img.width > 1024 or img.height > 1024:
-                    img.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
+                if img.width > px_w or img.height > px_h:
+                    img.thumbnail((px_w, px_h), Image.Resampling.LANCZOS)
                 jb = io.BytesIO()
                 img.save(jb, format='JPEG', quality=75, optimize=True)
                 jb.seek(0)
                 # Fit each photo into its half-page cell, preserving aspect ratio
-                cell_w, cell_h = (avail / 2) - 16, 190
                 ratio = min(cell_w / img.width, cell_h / img.height)
                 photo_flowables.append(RLImage(jb, width=img.width * ratio, height=img.height * ratio))
             except Exception:
@@ -2105,20 +2407,146 @@ def build_ops_summary_email(jobs, techs, locations, today_str):
 </table></td></tr></table></body></html>"""
     return subject, plain, html
 
+def _smtp_defaults():
+    """SMTP settings from secrets/env (each read once per process by config_value)."""
+    return {key: config_value(key, default) for key, default in
+            (("SMTP_SERVER", None), ("SMTP_PORT", 587), ("SMTP_EMAIL", None), ("SMTP_PASSWORD", None))}
+
+def smtp_config():
+    """Returns (server, port, email, password). Priority: Session > Secrets > Env;
+    the admin's saved overrides are merged over the cached defaults per call."""
+    cfg = _smtp_defaults()
+    cfg.update({k: v for k, v in (st.session_state.get('smtp_settings') or {}).items() if v})
+    return cfg["SMTP_SERVER"], cfg["SMTP_PORT"], cfg["SMTP_EMAIL"], cfg["SMTP_PASSWORD"]
+
+def smtp_connect(smtp_server, smtp_port, sender_email, sender_password):
+    """Opens an authenticated SMTP connection (implicit TLS on 465, STARTTLS otherwise)."""
+    if int(smtp_port) == 465:
+        server = smtplib.SMTP_SSL(smtp_server, int(smtp_port))
+        server.ehlo()
+    else:
+        server = smtplib.SMTP(smtp_server, int(smtp_port))
+        server.ehlo()
+        server.starttls()
+        server.ehlo()
+    server.login(sender_email, sender_password)
+    return server
+
+class PooledSMTP:
+    """A long-lived SMTP connection shared across reruns and sessions, so a
+    send costs one DATA exchange instead of connect + TLS + login + quit.
+    The connection is NOOP-checked before use, reopened if the server dropped
+    it, and rotated after MAX_MESSAGES for hosts with per-connection caps."""
+    MAX_MESSAGES = 50
+
+    def __init__(self, smtp_server, smtp_port, sender_email, sender_password):
+        self._config = (smtp_server, smtp_port, sender_email, sender_password)
+        self._server = None
+        self._sent = 0
+        self._lock = threading.Lock()
+
+    def _close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+        self._server = None
+
+    def _live_server(self):
+        if self._server is not None and self._sent < self.MAX_MESSAGES:
+            try:
+                if self._server.noop()[0] == 250:
+                    return self._server
+            except Exception:
+                pass
+        self._close()
+        self._server = smtp_connect(*self._config)
+        self._sent = 0
+        return self._server
+
+    def send_message(self, msg, to_addrs=None):
+        with self._lock:
+            try:
+                self._live_server().send_message(msg, to_addrs=to_addrs)
+            except smtplib.SMTPServerDisconnected:
+                # Dropped between the NOOP and the send - retry once on a fresh connection
+                self._close()
+                self._live_server().send_message(msg, to_addrs=to_addrs)
+            self._sent += 1
+
+    def __del__(self):
+        self._close()
+
+@st.cache_resource(show_spinner=False)
+def get_smtp(smtp_server, smtp_port, sender_email, sender_password):
+    """One PooledSMTP per SMTP configuration, shared by the whole process."""
+    return PooledSMTP(smtp_server, smtp_port, sender_email, sender_password)
+
+EMAIL_QUEUE_MAX = 200
+EMAIL_RETRY_DELAYS = (2, 8, 30)  # seconds between attempts after a failed send
+
+@st.cache_resource(show_spinner=False)
+def get_email_queue():
+    """Outbound mail queue drained by a single daemon thread for the whole process,
+    so SMTP round-trips never block a button click. Items are
+    (smtp_pool, message, to_addrs, label); message may also be a zero-arg
+    callable that builds it, for messages that are slow to build (PDF
+    attachments). Failed sends are retried with backoff (EMAIL_RETRY_DELAYS);
+    the queue is bounded so a dead mail server can't pile up work without limit.
+    Results go to the system log since the worker has no Streamlit session to
+    toast into. At interpreter exit the queue gets a few seconds to drain."""
+    q = queue.Queue(maxsize=EMAIL_QUEUE_MAX)
+
+    def run():
+        logger = get_logger()
+        while True:
+            smtp, msg, to_addrs, label = q.get()
+            try:
+                if callable(msg):
+                    msg = msg()
+                for attempt, delay in enumerate((0,) + EMAIL_RETRY_DELAYS):
+                    time.sleep(delay)
+                    try:
+                        smtp.send_message(msg, to_addrs=to_addrs)
+                        logger.log(f"Email sent: {label}")
+                        break
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused,
+                            smtplib.SMTPAuthenticationError) as e:
+                        logger.log(f"Email failed ({label}), not retrying: {e}")
+                        break
+                    except Exception as e:
+                        if attempt == len(EMAIL_RETRY_DELAYS):
+                            logger.log(f"Email failed ({label}) after {attempt + 1} attempts: {e}")
+            except Exception as e:
+                logger.log(f"Email failed ({label}): {e}")
+            finally:
+                q.task_done()
+
+    def drain(timeout=10):
+        deadline = time.monotonic() + timeout
+        while q.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+    threading.Thread(target=run, name="email_sender", daemon=True).start()
+    atexit.register(drain)
+    return q
+
+def enqueue_email(smtp, msg, label, to_addrs=None):
+    """Hands a built message to the background sender and returns immediately.
+    Returns False (and logs) if the queue is full."""
+    try:
+        get_email_queue().put_nowait((smtp, msg, to_addrs, label))
+        return True
+    except queue.Full:
+        get_logger().log(f"Email queue full, dropped: {label}")
+        return False
+
 def send_assignment_email(job, tech, location):
-    """Sends an email notification via SMTP, returning True if successful."""
-    # Helper to resolve config priority: Session > Secrets > Env
-    def get_config_val(key, default=None):
-        if 'smtp_settings' in st.session_state and st.session_state.smtp_settings.get(key):
-            return st.session_state.smtp_settings[key]
-        if key in st.secrets:
-            return st.secrets[key]
-        return os.getenv(key) or default
-
-    smtp_server = get_config_val("SMTP_SERVER")
-    smtp_port = get_config_val("SMTP_PORT", 587)
-    sender_email = get_config_val("SMTP_EMAIL")
-    sender_password = get_config_val("SMTP_PASSWORD")
+    """Queues an assignment email for background delivery via SMTP.
+    Returns "queued", "not_configured" (no SMTP settings) or "queue_full"
+    (the background sender is backed up; the email was dropped and logged)."""
+    smtp_server, smtp_port, sender_email, sender_password = smtp_config()
 
     # Prepare email content
     subject = f"New Job Assignment: {job['title']}"
@@ -2151,11 +2579,9 @@ def send_assignment_email(job, tech, location):
    Please check the 5G Security Job Board for full details.
    """
 
-    # If no credentials, we return False to trigger fallback UI
+    # If no credentials, the caller shows the manual-email fallback
     if not (smtp_server and sender_email and sender_password):
-        # 
-
-        return False
+        return "not_configured"
 
     # multipart/alternative: clients render the HTML version, plain text is the fallback
     msg = MIMEMultipart("alternative")
@@ -2168,39 +2594,17 @@ def send_assignment_email(job, tech, location):
     except Exception:
         pass  # plain-text version still sends
 
-    try:
-        if int(smtp_port) == 465:
-            server = smtplib.SMTP_SSL(smtp_server, int(smtp_port))
-            server.ehlo()
-        else:
-            server = smtplib.SMTP(smtp_server, int(smtp_port))
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
-
-        server.login(sender_email, sender_password)
-        server.send_message(msg)
-        server.quit()
-        st.toast(f"📧 Email successfully sent to {tech['name']}", icon="✅")
-        return True
-    except Exception as e:
-        st.error(f"Failed to send email: {str(e)}")
-        return False
+    smtp = get_smtp(smtp_server, smtp_port, sender_email, sender_password)
+    if not enqueue_email(smtp, msg, f"assignment '{job['title']}' to {tech['email']}"):
+        return "queue_full"
+    st.toast(f"📧 Assignment email queued for {tech['name']}", icon="✅")
+    return "queued"
 
 def send_completion_email(job, tech, location, report_data):
-    """Sends an email notification to Admins when a job is completed, with PDF attachment."""
-    # Helper to resolve config priority: Session > Secrets > Env
-    def get_config_val(key, default=None):
-        if 'smtp_settings' in st.session_state and st.session_state.smtp_settings.get(key):
-            return st.session_state.smtp_settings[key]
-        if key in st.secrets:
-            return st.secrets[key]
-        return os.getenv(key) or default
-
-    smtp_server = get_config_val("SMTP_SERVER")
-    smtp_port = get_config_val("SMTP_PORT", 587)
-    sender_email = get_config_val("SMTP_EMAIL")
-    sender_password = get_config_val("SMTP_PASSWORD")
+    """Queues the completion notification (with PDF report) to Admins. PDF
+    generation and delivery both happen on the background sender, so marking
+    a job Completed doesn't wait on ReportLab or SMTP."""
+    smtp_server, smtp_port, sender_email, sender_password = smtp_config()
     
     # Get recipients — construction jobs also notify the construction leads
     recipients = list(st.session_state.adminEmails)
@@ -2210,21 +2614,29 @@ def send_completion_email(job, tech, location, report_data):
         st.warning("No admin emails configured to receive completion notification.")
         return
 
-    # Generate PDF
-    try:
-        pdf_bytes = generate_job_pdf(job, tech, location, report_data)
-        if pdf_bytes:
-            pdf_size_mb = len(pdf_bytes) / (1024 * 1024)
-            get_logger().log(f"Generated PDF for job {job['id']}: {pdf_size_mb:.2f} MB")
-            if pdf_size_mb > 20:
-                st.warning(f"⚠️ PDF report is very large ({pdf_size_mb:.2f} MB). It may be rejected by some email servers.")
-    except Exception as e:
-        st.error(f"Failed to generate PDF report: {e}")
-        pdf_bytes = None
+    if not (smtp_server and sender_email and sender_password):
+        st.warning("SMTP not configured. Completion email could not be sent.")
+        return
 
-    # Prepare email content
-    subject = f"✅ Job Completed: {job['title']}"
-    body = f"""
+    # The worker builds from a snapshot, so later edits to the job don't race the PDF
+    job, tech, location, report_data = copy.deepcopy((job, tech, location, report_data))
+
+    def build_message():
+        logger = get_logger()
+        try:
+            pdf_bytes = generate_job_pdf(job, tech, location, report_data)
+            if pdf_bytes:
+                pdf_size_mb = len(pdf_bytes) / (1024 * 1024)
+                logger.log(f"Generated PDF for job {job['id']}: {pdf_size_mb:.2f} MB")
+                if pdf_size_mb > 20:
+                    logger.log(f"PDF for job {job['id']} is very large ({pdf_size_mb:.2f} MB); some servers may reject it.")
+        except Exception as e:
+            logger.log(f"Failed to generate PDF report for job {job['id']}: {e}")
+            pdf_bytes = None
+
+        # Prepare email content
+        subject = f"✅ Job Completed: {job['title']}"
+        body = f"""
     JOB COMPLETED NOTIFICATION
     
     Job:      {job['title']}
@@ -2235,22 +2647,6 @@ def send_completion_email(job, tech, location, report_data):
     Please see the attached PDF report for full details.
     """
 
-    if not (smtp_server and sender_email and sender_password):
-        st.warning("SMTP not configured. Completion email could not be sent.")
-        return
-
-    try:
-        if int(smtp_port) == 465:
-            server = smtplib.SMTP_SSL(smtp_server, int(smtp_port))
-            server.ehlo()
-        else:
-            server = smtplib.SMTP(smtp_server, int(smtp_port))
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
-
-        server.login(sender_email, sender_password)
-        
         # Styled HTML body (plain text rides along as the fallback)
         try:
             html_body = build_admin_email_html(
@@ -2267,46 +2663,35 @@ def send_completion_email(job, tech, location, report_data):
         except Exception:
             html_body = None
 
-        for recipient in recipients:
-            # Create fresh message for each recipient to avoid header issues.
-            # mixed( alternative(plain, html), pdf ) so the attachment shows in all clients.
-            alt = MIMEMultipart("alternative")
-            alt.attach(MIMEText(body, 'plain'))
-            if html_body:
-                alt.attach(MIMEText(html_body, 'html'))
-
-            msg = MIMEMultipart("mixed")
-            msg['From'] = sender_email
-            msg['To'] = recipient
-            msg['Subject'] = subject
-            msg.attach(alt)
+        # One message for all admins: the PDF is encoded and pushed once, not per recipient.
+        # mixed( alternative(plain, html), pdf ) so the attachment shows in all clients.
+        alt = MIMEMultipart("alternative")
+        alt.attach(MIMEText(body, 'plain'))
+        if html_body:
+            alt.attach(MIMEText(html_body, 'html'))
 
-            if pdf_bytes:
-                attachment = MIMEApplication(pdf_bytes, _subtype="pdf")
-                attachment.add_header('Content-Disposition', 'attachment', filename=f"Report_{job['id']}.pdf")
-                msg.attach(attachment)
-            
-            server.send_message(msg)
-            
-        server.quit()
-        st.toast("📧 Completion notification sent to Admins", icon="✅")
-    except Exception as e:
-        st.error(f"Failed to send completion email: {str(e)}")
+        msg = MIMEMultipart("mixed")
+        msg['From'] = sender_email
+        msg['To'] = ", ".join(recipients)
+        msg['Subject'] = subject
+        msg.attach(alt)
+
+        if pdf_bytes:
+            attachment = MIMEApplication(pdf_bytes, _subtype="pdf")
+            attachment.add_header('Content-Disposition', 'attachment', filename=f"Report_{job['id']}.pdf")
+            msg.attach(attachment)
+        return msg
+
+    smtp = get_smtp(smtp_server, smtp_port, sender_email, sender_password)
+    if enqueue_email(smtp, build_message, f"completion '{job['title']}' to {len(recipients)} admin(s)", to_addrs=recipients):
+        st.toast("📧 Completion notification queued for Admins", icon="✅")
+    else:
+        st.error("Email queue is full - completion email was not sent.")
 
 def send_daily_report_email(job, tech, location, report_data):
-    """Sends a Daily Report email to Admins with PDF attachment."""
-    # Helper to resolve config priority: Session > Secrets > Env
-    def get_config_val(key, default=None):
-        if 'smtp_settings' in st.session_state and st.session_state.smtp_settings.get(key):
-            return st.session_state.smtp_settings[key]
-        if key in st.secrets:
-            return st.secrets[key]
-        return os.getenv(key) or default
-
-    smtp_server = get_config_val("SMTP_SERVER")
-    smtp_port = get_config_val("SMTP_PORT", 587)
-    sender_email = get_config_val("SMTP_EMAIL")
-    sender_password = get_config_val("SMTP_PASSWORD")
+    """Queues the Daily Report email (with PDF) to Admins. Like the completion
+    email, the PDF is built and sent on the background sender."""
+    smtp_server, smtp_port, sender_email, sender_password = smtp_config()
     
     # Get recipients — construction jobs also notify the construction leads
     recipients = list(st.session_state.adminEmails)
@@ -2316,47 +2701,39 @@ def send_daily_report_email(job, tech, location, report_data):
         st.warning("No admin emails configured.")
         return
 
-    # Generate PDF
-    try:
-        pdf_bytes = generate_job_pdf(job, tech, location, report_data)
-        if pdf_bytes:
-            pdf_size_mb = len(pdf_bytes) / (1024 * 1024)
-            get_logger().log(f"Generated Daily PDF for job {job['id']}: {pdf_size_mb:.2f} MB")
-            if pdf_size_mb > 20:
-                st.warning(f"⚠️ PDF report is very large ({pdf_size_mb:.2f} MB). It may be rejected by some email servers.")
-    except Exception as e:
-        st.error(f"Failed to generate PDF report: {e}")
-        pdf_bytes = None
+    if not (smtp_server and sender_email and sender_password):
+        st.error("SMTP not configured. Daily report email could not be sent.")
+        return
 
-    # Prepare email content
-    subject = f"📝 Daily Report: {job['title']}"
-    body = f"""
+    job, tech, location, report_data = copy.deepcopy((job, tech, location, report_data))
+    report_date = now_local()
+
+    def build_message():
+        logger = get_logger()
+        try:
+            pdf_bytes = generate_job_pdf(job, tech, location, report_data)
+            if pdf_bytes:
+                pdf_size_mb = len(pdf_bytes) / (1024 * 1024)
+                logger.log(f"Generated Daily PDF for job {job['id']}: {pdf_size_mb:.2f} MB")
+                if pdf_size_mb > 20:
+                    logger.log(f"Daily PDF for job {job['id']} is very large ({pdf_size_mb:.2f} MB); some servers may reject it.")
+        except Exception as e:
+            logger.log(f"Failed to generate daily PDF for job {job['id']}: {e}")
+            pdf_bytes = None
+
+        # Prepare email content
+        subject = f"📝 Daily Report: {job['title']}"
+        body = f"""
     DAILY FIELD REPORT
     
     Job:      {job['title']}
     Tech:     {tech['name'] if tech else 'Unknown'}
     Location: {location['name'] if location else 'Unknown'}
-    Date:     {now_local().strftime('%Y-%m-%d')}
+    Date:     {report_date.strftime('%Y-%m-%d')}
     
     Please see the attached PDF report for today's details.
     """
 
-    if not (smtp_server and sender_email and sender_password):
-        st.error("SMTP not configured. Daily report email could not be sent.")
-        return
-
-    try:
-        if int(smtp_port) == 465:
-            server = smtplib.SMTP_SSL(smtp_server, int(smtp_port))
-            server.ehlo()
-        else:
-            server = smtplib.SMTP(smtp_server, int(smtp_port))
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
-
-        server.login(sender_email, sender_password)
-        
         # Styled HTML body (plain text rides along as the fallback)
         try:
             html_body = build_admin_email_html(
@@ -2366,7 +2743,7 @@ def send_daily_report_email(job, tech, location, report_data):
                     ("Job", job['title']),
                     ("Technician", tech['name'] if tech else 'Unknown'),
                     ("Location", location['name'] if location else 'Unknown'),
-                    ("Date", now_local().strftime('%Y-%m-%d')),
+                    ("Date", report_date.strftime('%Y-%m-%d')),
                     ("Hours Worked", report_data.get('hoursWorked') or 'N/A'),
                 ],
                 "Today's full report is attached as a PDF.",
@@ -2374,31 +2751,30 @@ def send_daily_report_email(job, tech, location, report_data):
         except Exception:
             html_body = None
 
-        for recipient in recipients:
-            # Create fresh message for each recipient.
-            # mixed( alternative(plain, html), pdf ) so the attachment shows in all clients.
-            alt = MIMEMultipart("alternative")
-            alt.attach(MIMEText(body, 'plain'))
-            if html_body:
-                alt.attach(MIMEText(html_body, 'html'))
-
-            msg = MIMEMultipart("mixed")
-            msg['From'] = sender_email
-            msg['To'] = recipient
-            msg['Subject'] = subject
-            msg.attach(alt)
+        # One message, one DATA transfer, every admin as a RCPT TO.
+        # mixed( alternative(plain, html), pdf ) so the attachment shows in all clients.
+        alt = MIMEMultipart("alternative")
+        alt.attach(MIMEText(body, 'plain'))
+        if html_body:
+            alt.attach(MIMEText(html_body, 'html'))
 
-            if pdf_bytes:
-                attachment = MIMEApplication(pdf_bytes, _subtype="pdf")
-                attachment.add_header('Content-Disposition', 'attachment', filename=f"DailyReport_{job['id']}_{now_local().strftime('%Y%m%d')}.pdf")
-                msg.attach(attachment)
-            
-            server.send_message(msg)
-            
-        server.quit()
-        st.toast("📧 Daily Report sent to Admins", icon="✅")
-    except Exception as e:
-        st.error(f"Failed to send daily report email: {str(e)}")
+        msg = MIMEMultipart("mixed")
+        msg['From'] = sender_email
+        msg['To'] = ", ".join(recipients)
+        msg['Subject'] = subject
+        msg.attach(alt)
+
+        if pdf_bytes:
+            attachment = MIMEApplication(pdf_bytes, _subtype="pdf")
+            attachment.add_header('Content-Disposition', 'attachment', filename=f"DailyReport_{job['id']}_{report_date.strftime('%Y%m%d')}.pdf")
+            msg.attach(attachment)
+        return msg
+
+    smtp = get_smtp(smtp_server, smtp_port, sender_email, sender_password)
+    if enqueue_email(smtp, build_message, f"daily report '{job['title']}' to {len(recipients)} admin(s)", to_addrs=recipients):
+        st.toast("📧 Daily Report queued for Admins", icon="✅")
+    else:
+        st.error("Email queue is full - daily report email was not sent. Try again shortly.")
 
 def send_daily_reminders():
     """Sends daily reminder emails to techs with active assignments (Mon-Fri only)."""
@@ -2417,17 +2793,7 @@ def send_daily_reminders():
         return
 
     # 2. Get SMTP Config
-    def get_config_val(key, default=None):
-        if 'smtp_settings' in st.session_state and st.session_state.smtp_settings.get(key):
-            return st.session_state.smtp_settings[key]
-        if key in st.secrets:
-            return st.secrets[key]
-        return os.getenv(key) or default
-
-    smtp_server = get_config_val("SMTP_SERVER")
-    smtp_port = get_config_val("SMTP_PORT", 587)
-    sender_email = get_config_val("SMTP_EMAIL")
-    sender_password = get_config_val("SMTP_PASSWORD")
+    smtp_server, smtp_port, sender_email, sender_password = smtp_config()
 
     if not (smtp_server and sender_email and sender_password):
         return # Cannot send email
@@ -2443,17 +2809,7 @@ def send_daily_reminders():
 
     sent = 0
     try:
-        # Connect once
-        if int(smtp_port) == 465:
-            server = smtplib.SMTP_SSL(smtp_server, int(smtp_port))
-            server.ehlo()
-        else:
-            server = smtplib.SMTP(smtp_server, int(smtp_port))
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
-
-        server.login(sender_email, sender_password)
+        server = get_smtp(smtp_server, smtp_port, sender_email, sender_password)
 
         subject, plain_body, html_body = build_ops_summary_email(
             st.session_state.jobs, st.session_state.techs, st.session_state.locations, today_str)
@@ -2471,8 +2827,6 @@ def send_daily_reminders():
             except Exception:
                 continue  # one bad address shouldn't stop the rest
 
-        server.quit()
-
         # Update State
         st.session_state.last_reminder_date = today_str
         save_state(invalidate_briefing=False)
@@ -2487,17 +2841,7 @@ def send_ops_summary_email(recipients, subject_prefix=""):
     """Sends the company-wide ops summary to the given recipients immediately.
     Used by the admin 'send test' button - bypasses the Mon-Fri / once-a-day guards.
     Returns (sent_count, error_message_or_None)."""
-    def get_config_val(key, default=None):
-        if 'smtp_settings' in st.session_state and st.session_state.smtp_settings.get(key):
-            return st.session_state.smtp_settings[key]
-        if key in st.secrets:
-            return st.secrets[key]
-        return os.getenv(key) or default
-
-    smtp_server = get_config_val("SMTP_SERVER")
-    smtp_port = get_config_val("SMTP_PORT", 587)
-    sender_email = get_config_val("SMTP_EMAIL")
-    sender_password = get_config_val("SMTP_PASSWORD")
+    smtp_server, smtp_port, sender_email, sender_password = smtp_config()
 
     if not (smtp_server and sender_email and sender_password):
         return 0, "SMTP is not configured (check the SMTP Configuration section)."
@@ -2507,15 +2851,7 @@ def send_ops_summary_email(recipients, subject_prefix=""):
     today_str = now_local().strftime("%Y-%m-%d")
     sent = 0
     try:
-        if int(smtp_port) == 465:
-            server = smtplib.SMTP_SSL(smtp_server, int(smtp_port))
-            server.ehlo()
-        else:
-            server = smtplib.SMTP(smtp_server, int(smtp_port))
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
-        server.login(sender_email, sender_password)
+        server = get_smtp(smtp_server, smtp_port, sender_email, sender_password)
 
         subject, plain_body, html_body = build_ops_summary_email(
             st.session_state.jobs, st.session_state.techs, st.session_state.locations, today_str)
@@ -2531,17 +2867,17 @@ def send_ops_summary_email(recipients, subject_prefix=""):
                 sent += 1
             except Exception:
                 continue
-        server.quit()
         return sent, None
     except Exception as e:
         return sent, str(e)
 
-def _send_hours_digest_email(company, label, recipients, smtp_server, smtp_port,
-                             sender_email, sender_password, jobs, techs, locations, start_d, end_d):
-    """Builds and emails a weekly hours digest for one company (CSV attached).
-    Pure/thread-safe — used by the Friday scheduler. Returns rows sent (0 if nothing)."""
+def _send_hours_digest_email(company, label, recipients, smtp, sender_email,
+                             jobs, techs, locations, start_d, end_d):
+    """Builds and emails a weekly hours digest for one company (CSV attached)
+    through smtp, a PooledSMTP. Pure/thread-safe — used by the Friday scheduler.
+    Returns rows sent (0 if nothing)."""
     recipients = list(dict.fromkeys([r for r in (recipients or []) if r]))  # dedup, keep order
-    if not (recipients and smtp_server and sender_email and sender_password):
+    if not (recipients and smtp and sender_email):
         return 0
     co_jobs = [j for j in jobs if (j.get('company', 'security')) == company]
     rows = compute_hours_rows(co_jobs, techs, locations, start_d, end_d)
@@ -2563,62 +2899,48 @@ def _send_hours_digest_email(company, label, recipients, smtp_server, smtp_port,
                                            f"Hours logged {start_d} to {end_d}:", detail_rows,
                                            "Full entry list attached as a CSV for payroll/invoicing.")
     except Exception:
-        html_body = None
-
-    csv_str = pd.DataFrame(rows).sort_values(["Date", "Tech"]).to_csv(index=False)
-    try:
-        if int(smtp_port) == 465:
-            server = smtplib.SMTP_SSL(smtp_server, int(smtp_port)); server.ehlo()
-        else:
-            server = smtplib.SMTP(smtp_server, int(smtp_port)); server.ehlo(); server.starttls(); server.ehlo()
-        server.login(sender_email, sender_password)
-        for recipient in recipients:
-            try:
-                alt = MIMEMultipart("alternative")
-                alt.attach(MIMEText(plain_body, 'plain'))
-                if html_body:
-                    alt.attach(MIMEText(html_body, 'html'))
-                msg = MIMEMultipart("mixed")
-                msg['From'] = sender_email
-                msg['To'] = recipient
-                msg['Subject'] = subject
-                msg.attach(alt)
-                attachment = MIMEApplication(csv_str.encode('utf-8'), _subtype="csv")
-                attachment.add_header('Content-Disposition', 'attachment',
-                                      filename=f"{company}_hours_{start_d}_{end_d}.csv")
-                msg.attach(attachment)
-                server.send_message(msg)
-            except Exception:
-                continue
-        server.quit()
+        html_body = None
+
+    import pandas as pd
+    csv_str = pd.DataFrame(rows).sort_values(["Date", "Tech"]).to_csv(index=False)
+    try:
+        # One message for the whole admin list - the CSV is encoded and sent once
+        alt = MIMEMultipart("alternative")
+        alt.attach(MIMEText(plain_body, 'plain'))
+        if html_body:
+            alt.attach(MIMEText(html_body, 'html'))
+        msg = MIMEMultipart("mixed")
+        msg['From'] = sender_email
+        msg['To'] = ", ".join(recipients)
+        msg['Subject'] = subject
+        msg.attach(alt)
+        attachment = MIMEApplication(csv_str.encode('utf-8'), _subtype="csv")
+        attachment.add_header('Content-Disposition', 'attachment',
+                              filename=f"{company}_hours_{start_d}_{end_d}.csv")
+        msg.attach(attachment)
+        try:
+            # A refused address doesn't stop delivery to the rest
+            smtp.send_message(msg, to_addrs=recipients)
+        except smtplib.SMTPRecipientsRefused:
+            pass
     except Exception:
         return 0
     return len(rows)
 
-def generate_morning_briefing():
-    """Generates the morning briefing using Gemini."""
-    api_key = get_api_key()
-    if not api_key:
-        return "⚠️ API Key missing. Please set GEMINI_API_KEY in secrets.toml or environment."
-    
-    if not st.session_state.jobs:
-        return "No active jobs to analyze. Please add jobs via the 'New Job' button."
-
-    # Use dynamic model selector
-    client, model_name = get_available_model(api_key)
-
-    # Security briefing only — construction jobs live in their own section
-    sec_jobs = [j for j in st.session_state.jobs if job_company(j) != 'construction']
-    active_jobs = [j for j in sec_jobs if j['status'] != 'Completed']
-    critical_jobs = [j for j in active_jobs if j['priority'] in ['Critical', 'High']]
+# Most active jobs listed by name in the briefing prompt (highest priority
+# first). The model only writes ~150 words; a longer list is just input tokens.
+BRIEFING_MAX_JOBS = 30
 
-    stale_lines = []
-    for j in active_jobs:
-        d = get_job_stale_days(j)
-        if d is not None and d >= STALE_JOB_DAYS:
-            stale_lines.append(f"- {j['title']} ({d} days without an update)")
-
-    current_date = now_local().strftime("%B %d, %Y")
+@st.cache_data(ttl=3600, show_spinner=False)
+def _briefing_for(_client, model_name, signature):
+    """Calls Gemini for the briefing described by signature (see
+    generate_morning_briefing). Keyed on that signature, so any rerun or
+    session asking for the same board state gets the text back instantly."""
+    current_date, n_active, active, n_critical, tech_names, stale = signature
+    job_lines = "\n".join(f"- {title} ({priority})" for title, priority in active)
+    if n_active > len(active):
+        job_lines += f"\n- ...and {n_active - len(active)} lower-priority jobs"
+    stale_lines = "\n".join(f"- {title} ({d} days without an update)" for title, d in stale)
 
     prompt = f"""
       You are the Operations Manager for 5G Security. Generate a concise "Morning Briefing" for the dashboard.
@@ -2627,15 +2949,15 @@ def generate_morning_briefing():
      Today's Date: {current_date}
 
      Data:
-     - Active Jobs: {len(active_jobs)}
-     - Critical: {len(critical_jobs)}
-     - Techs: {', '.join([t['name'] for t in st.session_state.techs])}
+     - Active Jobs: {n_active}
+     - Critical: {n_critical}
+     - Techs: {', '.join(tech_names)}
 
      Active Job List:
-     {chr(10).join([f"- {j['title']} ({j['priority']})" for j in active_jobs])}
+     {job_lines}
 
      Stale Jobs (no updates in {STALE_JOB_DAYS}+ days):
-     {chr(10).join(stale_lines) if stale_lines else "None"}
+     {stale_lines or "None"}
 
      Format:
      Start with the header: **Morning Briefing: 5G Security - {current_date}**
@@ -2648,9 +2970,61 @@ def generate_morning_briefing():
      Max 150 words. No markdown headers (#), use Bold instead.
    """
     
+    response = _client.models.generate_content(model=model_name, contents=prompt)
+    return response.text
+
+def generate_morning_briefing(force=False):
+    """Generates the morning briefing using Gemini. The last briefing is stored
+    in the state row with a digest of its inputs; when the board hasn't changed
+    in any way the briefing looks at, that text is reused without a model call
+    (across sessions and restarts). force=True always asks for a new take."""
+    api_key = get_api_key()
+    if not api_key:
+        return "⚠️ API Key missing. Please set GEMINI_API_KEY in secrets.toml or environment."
+    
+    if not st.session_state.jobs:
+        return "No active jobs to analyze. Please add jobs via the 'New Job' button."
+
+    # Use dynamic model selector
+    client, model_name = get_available_model(api_key)
+
+    # One pass over the board. Security briefing only — construction jobs live
+    # in their own section.
+    active_jobs, stale_jobs, n_critical = [], [], 0
+    for j in st.session_state.jobs:
+        if j['status'] == 'Completed' or job_company(j) == 'construction':
+            continue
+        active_jobs.append((j['title'], j['priority']))
+        if j['priority'] in ('Critical', 'High'):
+            n_critical += 1
+        d = get_job_stale_days(j)
+        if d is not None and d >= STALE_JOB_DAYS:
+            stale_jobs.append((j['title'], d))
+
+    # Only the top BRIEFING_MAX_JOBS by priority go in the prompt (stable sort,
+    # so board order breaks ties)
+    rank = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}
+    top_jobs = sorted(active_jobs, key=lambda a: rank.get(a[1], 4))[:BRIEFING_MAX_JOBS]
+
+    # Everything the prompt depends on, as hashable tuples - the cache key
+    signature = (
+        now_local().strftime("%B %d, %Y"),
+        len(active_jobs),
+        tuple(top_jobs),
+        n_critical,
+        tuple(t['name'] for t in st.session_state.techs),
+        tuple(stale_jobs),
+    )
+    digest = hashlib.blake2b(repr(signature).encode(), digest_size=8).hexdigest()
+    ensure_loaded_into_session()
+    stored = st.session_state.db.get('briefing_cache') or {}
+    if not force and stored.get('digest') == digest and stored.get('text'):
+        return stored['text']
+
     try:
-        response = client.models.generate_content(model=model_name, contents=prompt)
-        return response.text
+        text = _briefing_for(client, model_name, signature)
+        st.session_state.db['briefing_cache'] = {'digest': digest, 'text': text}
+        return text
     except Exception as e:
         err_msg = str(e)
         if "429" in err_msg or "RESOURCE_EXHAUSTED" in err_msg:
@@ -2727,20 +3101,8 @@ def add_job_dialog(company="security"):
         contact3_name = st.text_input("Additional Contact / Notes")
 
         # Tech Selection (scoped to this company's crew)
-        company_crew = company_techs(company)
-        tech_map = {t['name']: t['id'] for t in company_crew}
-
-        # Create display labels with skills
-        tech_display_map = {}
-        for t in company_crew:
-            skills_str = f" ({', '.join(t.get('skills', [])[:2])}..)" if t.get('skills') else ""
-            label = f"{t['name']}{skills_str}"
-            tech_display_map[label] = t['id']
-
-        tech_display_map["Unassigned"] = None
-
-        tech_label = st.selectbox("Assign Tech", list(tech_display_map.keys()))
-        selected_tech_id = tech_display_map[tech_label]
+        tech_labels = tech_picker_labels(company)
+        selected_tech_id = st.selectbox("Assign Tech", list(tech_labels), format_func=tech_labels.get)
 
         # Document Upload
         st.write("---")
@@ -2753,9 +3115,7 @@ def add_job_dialog(company="security"):
             final_loc_id = None
             if loc_selection == "➕ New Location":
                 if new_loc_name and new_loc_address:
-                    existing_ids = [int(l['id'][1:]) for l in st.session_state.locations if l['id'].startswith('l') and l['id'][1:].isdigit()]
-                    next_id = (max(existing_ids) if existing_ids else 0) + 1
-                    final_loc_id = f"l{next_id}"
+                    final_loc_id = next_seq_id(st.session_state.locations, 'l')
                     
                     new_loc = {
                         "id": final_loc_id,
@@ -2792,7 +3152,7 @@ def add_job_dialog(company="security"):
             full_date = datetime.datetime.combine(job_date, now_local().time())
             
             new_job = {
-                'id': f"j{len(st.session_state.jobs) + 100}_{now_local().timestamp()}",
+                'id': new_record_id('j'),
                 'title': title,
                 'description': desc,
                 'type': job_type,
@@ -2815,15 +3175,17 @@ def add_job_dialog(company="security"):
                 tech = get_tech(selected_tech_id)
                 loc = get_location(final_loc_id)
                 if tech and loc:
-                    success = send_assignment_email(new_job, tech, loc)
-                    if not success:
+                    email_result = send_assignment_email(new_job, tech, loc)
+                    if email_result == "not_configured":
                         email_status_msg = "SMTP not configured. Use the 'Email' button in Job Details to notify manually."
+                    elif email_result == "queue_full":
+                        email_status_msg = ("Job created, but the email sender is backed up and the assignment email "
+                                            "wasn't sent. Use the 'Email' button in Job Details to notify manually.")
                     # Push notification to the tech's phone (ntfy)
                     push_assignment(new_job, tech)
 
-            # Invalidate briefing so it regenerates with new data
-            st.session_state.briefing = "Data required to generate briefing."
-            save_state()  # Save changes
+            # A new job always changes the active count the briefing reports
+            save_state(invalidate_briefing=True)
             
             if email_status_msg:
                 st.toast(email_status_msg, icon="ℹ️")
@@ -2835,7 +3197,7 @@ def add_job_dialog(company="security"):
 @st.dialog("Edit Job Details")
 def edit_job_dialog(job_id):
     # Find job directly from session state
-    job_index = next((i for i, j in enumerate(st.session_state.jobs) if j['id'] == job_id), -1)
+    job_index = get_job_index(job_id)
     if job_index == -1:
         st.error("Job not found")
         return
@@ -2879,46 +3241,29 @@ def edit_job_dialog(job_id):
             
         job_date = st.date_input("Scheduled Date", value=existing_date)
         
-        # Location Selection
-        loc_map = {l['name']: l['id'] for l in st.session_state.locations}
-        loc_options = list(loc_map.keys())
-        
+        # Location Selection - options are ids (names shown via the O(1)
+        # get_location index), so the current one is found without a reverse
+        # name lookup and two sites sharing a name stay distinct
+        loc_options = [l['id'] for l in st.session_state.locations]
         current_loc_id = job.get('locationId')
-        current_loc_name = next((k for k, v in loc_map.items() if v == current_loc_id), None)
-        
-        loc_index = 0
-        if current_loc_name and current_loc_name in loc_options:
-            loc_index = loc_options.index(current_loc_name)
+        loc_index = loc_options.index(current_loc_id) if current_loc_id in loc_options else 0
             
         if loc_options:
-            loc_name = st.selectbox("Location", loc_options, index=loc_index)
+            loc_id = st.selectbox("Location", loc_options, index=loc_index,
+                                  format_func=lambda i: get_location(i)['name'])
         else:
             st.warning("No locations found.")
-            loc_name = None
+            loc_id = None
         
         # Tech Selection (scoped to the job's company so crews don't cross over)
-        company_crew = company_techs(job_company(job))
+        tech_labels = tech_picker_labels(job_company(job))
+        tech_options = list(tech_labels)
 
-        # Create display labels with skills
-        tech_display_map = {}
-        for t in company_crew:
-            skills_str = f" ({', '.join(t.get('skills', [])[:2])}..)" if t.get('skills') else ""
-            label = f"{t['name']}{skills_str}"
-            tech_display_map[label] = t['id']
-
-        tech_display_map["Unassigned"] = None
-        tech_options = list(tech_display_map.keys())
-        
         current_tech_id = job.get('techId')
-        # Find label for current ID
-        current_tech_label = next((k for k, v in tech_display_map.items() if v == current_tech_id), "Unassigned")
-        
-        tech_index = 0
-        if current_tech_label in tech_options:
-            tech_index = tech_options.index(current_tech_label)
-            
-        tech_label = st.selectbox("Assign Tech", tech_options, index=tech_index)
-        selected_tech_id = tech_display_map[tech_label]
+        tech_index = tech_options.index(current_tech_id if current_tech_id in tech_labels else None)
+
+        selected_tech_id = st.selectbox("Assign Tech", tech_options, index=tech_index,
+                                        format_func=tech_labels.get)
         
         # Site Contacts
         st.write("---")
@@ -2975,6 +3320,8 @@ def edit_job_dialog(job_id):
                 if contact3_name: 
                     new_contacts.append({'name': contact3_name, 'phone': '', 'label': 'Note'})
                 
+                _prev_title = st.session_state.jobs[job_index]['title']
+                _prev_priority = st.session_state.jobs[job_index]['priority']
                 st.session_state.jobs[job_index]['contacts'] = new_contacts
                 st.session_state.jobs[job_index]['title'] = title
                 st.session_state.jobs[job_index]['description'] = desc
@@ -2986,8 +3333,8 @@ def edit_job_dialog(job_id):
                 full_date = datetime.datetime.combine(job_date, existing_time)
                 st.session_state.jobs[job_index]['date'] = full_date.isoformat()
                 
-                if loc_name:
-                    st.session_state.jobs[job_index]['locationId'] = loc_map[loc_name]
+                if loc_id:
+                    st.session_state.jobs[job_index]['locationId'] = loc_id
                 
                 # Push-notify the new tech if the job changed hands
                 _prev_tech_id = st.session_state.jobs[job_index].get('techId')
@@ -2997,9 +3344,8 @@ def edit_job_dialog(job_id):
                     if _new_tech:
                         push_assignment(st.session_state.jobs[job_index], _new_tech)
 
-                # Invalidate briefing so it regenerates with new data
-                st.session_state.briefing = "Data required to generate briefing."
-                save_state()  # Save changes
+                # Only title/priority feed the briefing prompt
+                save_state(invalidate_briefing=(title, priority) != (_prev_title, _prev_priority))
 
                 st.toast("Job updated successfully!", icon="✅")
                 st.rerun()
@@ -3047,6 +3393,14 @@ def render_completion_confirmation(job_index, report_payload):
     st.warning("You are marking this job as **Completed**. This will archive the job and notify admins.")
     st.caption("Your daily report is attached to this sign-off and will be saved when you confirm. Cancelling discards it.")
 
+    # The notes are known already - summarize them while the checklist and
+    # signature are filled in, instead of after Confirm is clicked
+    prefetch_key = f"summary_prefetch_{job['id']}"
+    notes = report_payload.get("content")
+    prefetch = st.session_state.get(prefetch_key)
+    if notes and (prefetch is None or prefetch[0] != notes):
+        st.session_state[prefetch_key] = (notes, prefetch_technician_summary(notes, job["title"]))
+
     completion_loc = get_location(job['locationId'])
     if completion_loc and not location_has_system_info(completion_loc):
         st.error("🔐 No system info (logins / IPs) has been recorded for this site. Please fill out the **IPs & Passwords** tab before closing the job.")
@@ -3094,14 +3448,18 @@ def render_completion_confirmation(job_index, report_payload):
 
         # Handle Signature (R2)
         if HAS_CANVAS and signature_data is not None:
-            if signature_data.sum() > 0:
+            # any() stops at the first drawn pixel; sum() reduced the whole canvas
+            if signature_data.any():
                 try:
-                    img = Image.fromarray(signature_data.astype("uint8"), "RGBA")
+                    # copy=False: no second full-canvas array when it's uint8 already.
+                    # The canvas is mostly empty, so zlib level 1 is nearly as small
+                    # as the default 6 for a fraction of the CPU
+                    img = Image.fromarray(signature_data.astype("uint8", copy=False), "RGBA")
                     buf = io.BytesIO()
-                    img.save(buf, format="PNG")
+                    img.save(buf, format="PNG", compress_level=1)
                     buf.seek(0)
 
-                    sig_key = f"signatures/{job['id']}_{datetime.datetime.utcnow().timestamp()}.png"
+                    sig_key = f"signatures/{job['id']}_{uuid.uuid4().hex[:12]}.png"
                     upload_bytes(buf.getvalue(), sig_key, content_type="image/png")
 
                     report_payload["signature_key"] = sig_key
@@ -3118,7 +3476,15 @@ def render_completion_confirmation(job_index, report_payload):
 
         if report_payload.get("content"):
             with st.spinner("Generating AI Summary..."):
-                summary = generate_technician_summary(report_payload["content"], job["title"])
+                prefetch = st.session_state.pop(prefetch_key, None)
+                if prefetch and prefetch[1] is not None and prefetch[0] == report_payload["content"]:
+                    try:
+                        summary = prefetch[1].result(timeout=20)
+                    except Exception:
+                        summary = None
+                else:
+                    # A closing note changed the text (or nothing was prefetched)
+                    summary = generate_technician_summary(report_payload["content"], job["title"])
                 if summary:
                     report_payload["ai_summary"] = summary
 
@@ -3130,7 +3496,7 @@ def render_completion_confirmation(job_index, report_payload):
         loc = get_location(job["locationId"])
         send_completion_email(job, tech, loc, report_payload)
 
-        save_state()
+        save_report(job_index, report_payload, invalidate_briefing=True)
 
         if f"completion_pending_{job['id']}" in st.session_state:
             del st.session_state[f"completion_pending_{job['id']}"]
@@ -3141,11 +3507,12 @@ def render_completion_confirmation(job_index, report_payload):
     if c_cancel.button("❌ Cancel & Discard Report"):
         if f"completion_pending_{job['id']}" in st.session_state:
             del st.session_state[f"completion_pending_{job['id']}"]
+        st.session_state.pop(prefetch_key, None)
         st.rerun(scope="fragment")
         
 def render_edit_report_view(job_id, report_id):
     # Find job
-    job_index = next((i for i, j in enumerate(st.session_state.jobs) if j['id'] == job_id), -1)
+    job_index = get_job_index(job_id)
     if job_index == -1:
         st.error("Job not found")
         return
@@ -3167,7 +3534,8 @@ def render_edit_report_view(job_id, report_id):
             available_techs = [t['name'] for t in st.session_state.techs]
             current_techs_str = report.get('techsOnSite', '')
             current_techs = [t.strip() for t in current_techs_str.split(',')] if current_techs_str else []
-            current_techs = [t for t in current_techs if t in available_techs]
+            known_techs = set(available_techs)
+            current_techs = [t for t in current_techs if t in known_techs]
             
             techs_on_site_list = st.multiselect("Techs On Site", options=available_techs, default=current_techs)
             
@@ -3234,10 +3602,129 @@ def render_edit_report_view(job_id, report_id):
             del st.session_state[f"editing_report_{job_id}"]
         st.rerun(scope="fragment")
 
+@st.fragment
+def render_job_docs_tab(job_id):
+    """Documents tab of the job dialog. Runs as its own fragment so uploads,
+    moves and the destination radio rerun just this tab, not every tab."""
+    job = get_job(job_id)
+    if job is None:
+        return
+    loc = get_location(job['locationId'])
+
+    st.write("#### 📄 Documents")
+    st.caption("Floorplans, maps, and reference documents. Site documents follow the location across every job.")
+
+    with st.expander("➕ Upload New Document"):
+        dest_options = []
+        if loc:
+            dest_options.append(f"🏢 Site — {loc['name']} (shared across all its jobs)")
+        dest_options.append("📋 This job only")
+        dest_choice = st.radio("Save to", dest_options, key=f"doc_dest_{job_id}")
+
+        new_uploaded_docs = st.file_uploader("Select files (PDF, JPG, PNG)", accept_multiple_files=True, type=['pdf', 'jpg', 'png', 'jpeg'], key=f"tab_docs_upload_{job_id}")
+        if st.button("Save Uploaded Documents", key=f"btn_save_tab_docs_{job_id}"):
+            if new_uploaded_docs:
+                with st.spinner("Uploading..."):
+                    to_site = bool(loc) and dest_choice.startswith("🏢")
+                    folder = f"locations/{loc['id']}/docs" if to_site else f"jobs/{job_id}/docs"
+                    new_keys = []
+                    for f in new_uploaded_docs:
+                        k = upload_streamlit_file(f, folder=folder)
+                        if k:
+                            new_keys.append({"name": f.name, "key": k})
+
+                    if new_keys:
+                        if to_site:
+                            loc.setdefault('documents', []).extend(new_keys)
+                        else:
+                            job.setdefault('documents', []).extend(new_keys)
+                        save_state(invalidate_briefing=False)
+                        st.success(f"Uploaded {len(new_keys)} document(s)!")
+                        st.rerun(scope="fragment")
+            else:
+                st.warning("Please select files first.")
+
+    def render_doc_row(d, key_suffix, allow_move_to_site=False):
+        with st.container(border=True):
+            d_col1, d_col2 = st.columns([3, 1])
+            d_col1.write(f"**{d['name']}**")
+            url = resolve_image_source(d['key'])
+
+            # If it's an image, we can show a small preview
+            ext = d['name'].lower().split('.')[-1]
+            if ext in ['jpg', 'jpeg', 'png']:
+                st.image(url, width=200)
+
+            d_col2.link_button("👁️ View / Download", url, use_container_width=True)
+            if allow_move_to_site and loc:
+                if d_col2.button("🏢 Move to Site", key=f"mv_doc_{key_suffix}", use_container_width=True, help="Share this document across every job at this location"):
+                    loc.setdefault('documents', []).append(d)
+                    job['documents'] = [x for x in job.get('documents', []) if x['key'] != d['key']]
+                    save_state(invalidate_briefing=False)
+                    st.toast(f"'{d['name']}' moved to site documents", icon="🏢")
+                    st.rerun(scope="fragment")
+
+    if loc:
+        st.write(f"##### 🏢 Site Documents — {loc['name']}")
+        site_docs = loc.get('documents', [])
+        if not site_docs:
+            st.caption("No site documents yet. Floorplans and as-builts belong here.")
+        for i, d in enumerate(site_docs):
+            render_doc_row(d, f"site_{i}")
+        st.divider()
+
+    st.write("##### 📋 This Job's Documents")
+    docs = job.get('documents', [])
+    if not docs:
+        st.caption("No documents on this job.")
+    for i, d in enumerate(docs):
+        render_doc_row(d, f"job_{i}", allow_move_to_site=True)
+
+@st.fragment
+def render_job_photos_tab(job_id):
+    """Photos tab of the job dialog, as its own fragment (see render_job_docs_tab)."""
+    job = get_job(job_id)
+    if job is None:
+        return
+
+    st.write("#### 🖼️ All Job Photos")
+    # Gather every photo/PDF across all history entries, newest first
+    photo_entries = []
+    seen_photo_keys = set()
+    for r in job.get('reports', []):
+        for p_key in (r.get('photos') or []):
+            if p_key in seen_photo_keys:
+                continue
+            seen_photo_keys.add(p_key)
+            photo_entries.append({'key': p_key, 'timestamp': r.get('timestamp', ''), 'techId': r.get('techId')})
+    photo_entries.sort(key=lambda x: x['timestamp'], reverse=True)
+
+    if not photo_entries:
+        st.info("No photos posted for this job yet.")
+    else:
+        st.caption(f"{len(photo_entries)} photo(s) across all reports, newest first.")
+        show_all_photos = True
+        if len(photo_entries) > 12:
+            show_all_photos = st.checkbox(f"Show all {len(photo_entries)} photos", key=f"show_all_photos_{job_id}")
+            if not show_all_photos:
+                st.caption("Showing the 12 most recent.")
+        visible_entries = photo_entries if show_all_photos else photo_entries[:12]
+
+        p_cols = st.columns(3)
+        for i, pe in enumerate(visible_entries):
+            with p_cols[i % 3]:
+                url = resolve_image_source(pe['key'])
+                p_tech = get_tech(pe['techId'])
+                cap = f"{pe['timestamp'][:10]} · {p_tech['name'] if p_tech else 'Unknown'}"
+                if isinstance(pe['key'], str) and pe['key'].lower().endswith('.pdf'):
+                    st.link_button(f"📄 PDF — {cap}", url, use_container_width=True)
+                else:
+                    st.image(url, caption=cap, use_container_width=True)
+
 @st.dialog("Job Details & Report", width="large")
 def job_details_dialog(job_id):
     # Find job directly from session state
-    job_index = next((i for i, j in enumerate(st.session_state.jobs) if j['id'] == job_id), -1)
+    job_index = get_job_index(job_id)
     if job_index == -1:
         st.error("Job not found")
         return
@@ -3390,109 +3877,10 @@ Desc: {job['description']}"""
     tab_creds = _tabs[6] if not is_construction_job else None
 
     with tab_docs:
-        st.write("#### 📄 Documents")
-        st.caption("Floorplans, maps, and reference documents. Site documents follow the location across every job.")
-
-        with st.expander("➕ Upload New Document"):
-            dest_options = []
-            if loc:
-                dest_options.append(f"🏢 Site — {loc['name']} (shared across all its jobs)")
-            dest_options.append("📋 This job only")
-            dest_choice = st.radio("Save to", dest_options, key=f"doc_dest_{job_id}")
-
-            new_uploaded_docs = st.file_uploader("Select files (PDF, JPG, PNG)", accept_multiple_files=True, type=['pdf', 'jpg', 'png', 'jpeg'], key=f"tab_docs_upload_{job_id}")
-            if st.button("Save Uploaded Documents", key=f"btn_save_tab_docs_{job_id}"):
-                if new_uploaded_docs:
-                    with st.spinner("Uploading..."):
-                        to_site = bool(loc) and dest_choice.startswith("🏢")
-                        folder = f"locations/{loc['id']}/docs" if to_site else f"jobs/{job_id}/docs"
-                        new_keys = []
-                        for f in new_uploaded_docs:
-                            k = upload_streamlit_file(f, folder=folder)
-                            if k:
-                                new_keys.append({"name": f.name, "key": k})
-
-                        if new_keys:
-                            if to_site:
-                                loc.setdefault('documents', []).extend(new_keys)
-                            else:
-                                job.setdefault('documents', []).extend(new_keys)
-                            save_state(invalidate_briefing=False)
-                            st.success(f"Uploaded {len(new_keys)} document(s)!")
-                            st.rerun(scope="fragment")
-                else:
-                    st.warning("Please select files first.")
-
-        def render_doc_row(d, key_suffix, allow_move_to_site=False):
-            with st.container(border=True):
-                d_col1, d_col2 = st.columns([3, 1])
-                d_col1.write(f"**{d['name']}**")
-                url = resolve_image_source(d['key'])
-
-                # If it's an image, we can show a small preview
-                ext = d['name'].lower().split('.')[-1]
-                if ext in ['jpg', 'jpeg', 'png']:
-                    st.image(url, width=200)
-
-                d_col2.link_button("👁️ View / Download", url, use_container_width=True)
-                if allow_move_to_site and loc:
-                    if d_col2.button("🏢 Move to Site", key=f"mv_doc_{key_suffix}", use_container_width=True, help="Share this document across every job at this location"):
-                        loc.setdefault('documents', []).append(d)
-                        job['documents'] = [x for x in job.get('documents', []) if x['key'] != d['key']]
-                        save_state(invalidate_briefing=False)
-                        st.toast(f"'{d['name']}' moved to site documents", icon="🏢")
-                        st.rerun(scope="fragment")
-
-        if loc:
-            st.write(f"##### 🏢 Site Documents — {loc['name']}")
-            site_docs = loc.get('documents', [])
-            if not site_docs:
-                st.caption("No site documents yet. Floorplans and as-builts belong here.")
-            for i, d in enumerate(site_docs):
-                render_doc_row(d, f"site_{i}")
-            st.divider()
-
-        st.write("##### 📋 This Job's Documents")
-        docs = job.get('documents', [])
-        if not docs:
-            st.caption("No documents on this job.")
-        for i, d in enumerate(docs):
-            render_doc_row(d, f"job_{i}", allow_move_to_site=True)
+        render_job_docs_tab(job_id)
 
     with tab_photos:
-        st.write("#### 🖼️ All Job Photos")
-        # Gather every photo/PDF across all history entries, newest first
-        photo_entries = []
-        seen_photo_keys = set()
-        for r in job.get('reports', []):
-            for p_key in (r.get('photos') or []):
-                if p_key in seen_photo_keys:
-                    continue
-                seen_photo_keys.add(p_key)
-                photo_entries.append({'key': p_key, 'timestamp': r.get('timestamp', ''), 'techId': r.get('techId')})
-        photo_entries.sort(key=lambda x: x['timestamp'], reverse=True)
-
-        if not photo_entries:
-            st.info("No photos posted for this job yet.")
-        else:
-            st.caption(f"{len(photo_entries)} photo(s) across all reports, newest first.")
-            show_all_photos = True
-            if len(photo_entries) > 12:
-                show_all_photos = st.checkbox(f"Show all {len(photo_entries)} photos", key=f"show_all_photos_{job_id}")
-                if not show_all_photos:
-                    st.caption("Showing the 12 most recent.")
-            visible_entries = photo_entries if show_all_photos else photo_entries[:12]
-
-            p_cols = st.columns(3)
-            for i, pe in enumerate(visible_entries):
-                with p_cols[i % 3]:
-                    url = resolve_image_source(pe['key'])
-                    p_tech = get_tech(pe['techId'])
-                    cap = f"{pe['timestamp'][:10]} · {p_tech['name'] if p_tech else 'Unknown'}"
-                    if isinstance(pe['key'], str) and pe['key'].lower().endswith('.pdf'):
-                        st.link_button(f"📄 PDF — {cap}", url, use_container_width=True)
-                    else:
-                        st.image(url, caption=cap, use_container_width=True)
+        render_job_photos_tab(job_id)
 
     with tab_parts:
         st.write("#### 🔩 Parts & Materials")
@@ -3543,7 +3931,7 @@ Desc: {job['description']}"""
                         st.warning("Please enter an item name.")
                     else:
                         st.session_state.jobs[job_index].setdefault('parts', []).append({
-                            'id': f"p{datetime.datetime.now().timestamp()}",
+                            'id': new_record_id('p'),
                             'name': new_name.strip(),
                             'qty': int(new_qty),
                             'status': new_status,
@@ -3611,7 +3999,7 @@ Desc: {job['description']}"""
                 for sys_name, u_key, p_key in legacy_logins:
                     if legacy.get(u_key) or legacy.get(p_key):
                         migrated.append({
-                            'id': f"s{now_local().timestamp()}_{len(migrated)}",
+                            'id': new_record_id('s'),
                             'name': sys_name,
                             'username': legacy.get(u_key, ''),
                             'password': legacy.get(p_key, ''),
@@ -3620,7 +4008,7 @@ Desc: {job['description']}"""
                         })
                 if legacy.get('ips'):
                     migrated.append({
-                        'id': f"s{now_local().timestamp()}_{len(migrated)}",
+                        'id': new_record_id('s'),
                         'name': "Network / IPs",
                         'username': '',
                         'password': '',
@@ -3652,7 +4040,7 @@ Desc: {job['description']}"""
                         else:
                             sys_name = custom_name.strip() or sys_type
                             loc.setdefault('systems', []).append({
-                                'id': f"s{now_local().timestamp()}",
+                                'id': new_record_id('s'),
                                 'name': sys_name,
                                 'username': new_user,
                                 'password': new_pass,
@@ -3753,22 +4141,33 @@ Desc: {job['description']}"""
         if not job['reports']:
             st.info("No reports filed yet.")
         
-        # Limit history display to avoid performance issues with many images
-        reports_to_show = reversed(job['reports'])
+        # Page through history (newest first) so a long-running job doesn't push
+        # every report and photo to the browser on each dialog rerun
         total_reports = len(job['reports'])
-        
-        show_all_key = f"show_all_history_{job_id}"
-        show_all = st.checkbox("Show Full History", key=show_all_key) if total_reports > 5 else True
-        
-        if not show_all:
-            reports_to_show = list(reversed(job['reports']))[:5]
-            st.caption(f"Showing latest 5 of {total_reports} reports.")
+        limit_key = f"history_limit_{job_id}"
+        history_limit = st.session_state.get(limit_key, 5)
+        reports_to_show = job['reports'][::-1][:history_limit]
+        if total_reports > history_limit:
+            pg1, pg2 = st.columns([3, 1], vertical_alignment="center")
+            pg1.caption(f"Showing latest {history_limit} of {total_reports} reports.")
+            if pg2.button("Show 10 more", key=f"history_more_{job_id}", use_container_width=True):
+                st.session_state[limit_key] = history_limit + 10
+                st.rerun(scope="fragment")
 
         # Admin check
         user_email = st.session_state.user_info.get("email") if "user_info" in st.session_state else None
         is_admin = user_email in st.session_state.adminEmails if user_email else False
         # Current user's tech profile (techs may manage their own entries)
-        viewer_tech = next((t for t in st.session_state.techs if user_email and t['email'].lower() == user_email.lower()), None)
+        viewer_tech = get_tech_by_email(user_email)
+
+        # Move targets are the same for every entry - build them once, not per report
+        other_jobs = {j['id']: j for j in st.session_state.jobs
+                      if j['id'] != job_id and job_company(j) == job_company(job)}
+
+        def _fmt_job_option(jid):
+            j = other_jobs[jid]
+            j_loc = get_location(j['locationId'])
+            return f"{j['title']} — {j_loc['name'] if j_loc else 'No location'}"
 
         for r in reports_to_show:
             r_tech = get_tech(r['techId'])
@@ -3787,19 +4186,12 @@ Desc: {job['description']}"""
                 if can_manage:
                     with hdr_move.popover("↪️ Move"):
                         st.caption("Filed under the wrong job? Move this entry (notes & photos) to the correct one.")
-                        other_jobs = {j['id']: j for j in st.session_state.jobs
-                                      if j['id'] != job_id and job_company(j) == job_company(job)}
                         if not other_jobs:
                             st.caption("No other jobs to move to.")
                         else:
-                            def _fmt_job_option(jid):
-                                j = other_jobs[jid]
-                                j_loc = get_location(j['locationId'])
-                                return f"{j['title']} — {j_loc['name'] if j_loc else 'No location'}"
-
                             target_id = st.selectbox("Move to job:", list(other_jobs.keys()), format_func=_fmt_job_option, key=f"move_target_{r['id']}")
                             if st.button("Confirm Move", key=f"move_btn_{r['id']}", type="primary", use_container_width=True):
-                                target_idx = next((i for i, j in enumerate(st.session_state.jobs) if j['id'] == target_id), -1)
+                                target_idx = get_job_index(target_id)
                                 if target_idx != -1:
                                     st.session_state.jobs[target_idx].setdefault('reports', []).append(r)
                                     st.session_state.jobs[job_index]['reports'] = [x for x in st.session_state.jobs[job_index]['reports'] if x['id'] != r['id']]
@@ -3885,7 +4277,7 @@ Desc: {job['description']}"""
             tc1.caption("Not clocked in.")
             if tc2.button("⏱️ Clock In", key=f"clockin_{job_id}", use_container_width=True):
                 entries.append({
-                    'id': f"tc{now_local().timestamp()}",
+                    'id': new_record_id('tc'),
                     'userEmail': viewer_email,
                     'tech_name': viewer_name or viewer_email,
                     'clock_in': now_local().isoformat(),
@@ -3938,7 +4330,7 @@ Desc: {job['description']}"""
             if qs_cols[i].button(label, key=f"qs_{i}_{job_id}"):
                 # Post update immediately
                 report_payload = {
-                    'id': f"r{now_local().timestamp()}",
+                    'id': new_record_id('r'),
                     'techId': job['techId'] or 'unknown',
                     'timestamp': now_local().isoformat(),
                     'content': f"[{label}] {note_text}",
@@ -3952,7 +4344,7 @@ Desc: {job['description']}"""
                 if label == "📍 Arrived" and job['status'] in ['Pending', 'Not Started']:
                     st.session_state.jobs[job_index]['status'] = 'In Progress'
                 
-                save_state()
+                save_report(job_index, report_payload)
                 st.toast(f"Status updated: {label}", icon="✅")
                 st.rerun(scope="fragment")
 
@@ -3990,7 +4382,7 @@ Desc: {job['description']}"""
                 if prog_note or photos_list:
                     # Construct Simple Report Data
                     report_payload = {
-                        'id': f"r{now_local().timestamp()}",
+                        'id': new_record_id('r'),
                         'techId': job['techId'] or 'unknown',
                         'timestamp': now_local().isoformat(),
                         'content': prog_note,
@@ -4002,11 +4394,12 @@ Desc: {job['description']}"""
                     st.session_state.jobs[job_index]['reports'].append(report_payload)
                     
                     # Auto-set status to In Progress if Pending
+                    invalidate = False
                     if job['status'] in ['Pending', 'Not Started']:
+                        invalidate = status_change_affects_briefing(job['status'], 'In Progress', job.get('priority'))
                         st.session_state.jobs[job_index]['status'] = 'In Progress'
-                        st.session_state.briefing = "Data required to generate briefing."
                     
-                    save_state()
+                    save_report(job_index, report_payload, invalidate_briefing=invalidate)
                     st.success("Update Posted!")
                     st.rerun(scope="fragment")
                 else:
@@ -4037,7 +4430,7 @@ Desc: {job['description']}"""
                 # Also save to history if not already there (optional, but good practice)
                 # We'll append it as a report so there's a record
                 st.session_state.jobs[job_index]['reports'].append(payload)
-                save_state()
+                save_report(job_index, payload)
                 
                 del st.session_state[confirm_key]
                 st.success("Report Sent & Saved!")
@@ -4112,7 +4505,8 @@ Desc: {job['description']}"""
             with r_col1:
                 # Techs on Site: Multiselect
                 available_techs = [t['name'] for t in st.session_state.techs]
-                default_techs = [tech['name']] if tech and tech['name'] in available_techs else []
+                # tech came from get_tech(), i.e. this same list, so it's always a valid option
+                default_techs = [tech['name']] if tech else []
                 
                 techs_on_site_list = st.multiselect("Techs On Site", options=available_techs, default=default_techs)
                 time_arrived = st.time_input("Time Arrived", value=default_arrived)
@@ -4173,7 +4567,7 @@ Desc: {job['description']}"""
 
                 # Construct Report Data
                 report_payload = {
-                    'id': f"r{now_local().timestamp()}",
+                    'id': new_record_id('r'),
                     'techId': job['techId'] or 'unknown',
                     'timestamp': now_local().isoformat(),
                     'content': content,
@@ -4207,11 +4601,12 @@ Desc: {job['description']}"""
                         st.session_state.jobs[job_index]['reports'].append(report_payload)
                         
                         # Update Status
+                        invalidate = False
                         if new_status != job['status']:
+                            invalidate = status_change_affects_briefing(job['status'], new_status, job.get('priority'))
                             st.session_state.jobs[job_index]['status'] = new_status
-                            st.session_state.briefing = "Data required to generate briefing."
                         
-                        save_state()
+                        save_report(job_index, report_payload, invalidate_briefing=invalidate)
                         st.success("Daily Report Submitted & Emailed to Admins!")
                         st.rerun(scope="fragment")
 
@@ -4244,7 +4639,42 @@ Desc: {job['description']}"""
 # --- UI COMPONENTS ---
 
 
-def render_job_card(job, compact=False, key_suffix="", allow_delete=False):
+_JOB_CARD_TPL = string.Template("""
+        <div class="job-card $priority_class" style="position:relative; overflow:hidden; border-top: 4px solid $status_bg;">
+            <div style="position:absolute; top:0; right:0; padding:2px 8px; background:$status_bg; color:white; font-size:0.65em; font-weight:bold; border-bottom-left-radius:8px;">
+                $status
+            </div>
+            <div style="display:flex; justify-content:space-between; margin-top:10px;">
+                <span style="font-weight:bold; font-size:1.1em; max-width:70%;">$title</span>
+                <span style="font-size:0.8em; background:#3f3f46; padding:2px 6px; border-radius:4px; height:fit-content;">$priority</span>
+            </div>
+            <div style="color:#a1a1aa; font-size:0.9em; margin-top:5px;">$loc_html</div>
+            <div style="display:flex; justify-content:space-between; margin-top:10px; font-size:0.8em; color:#71717a;">
+                 <span>👤 $tech_name</span>
+                 <span>📅 $date</span>
+            </div>$stale_html$parts_html
+        </div>
+        """)
+
+def job_card_html(job):
+    """The static part of a job card (everything except its widgets) as HTML.
+    The same job shows up in several tabs per rerun (board, feeds, type tabs),
+    so the markup is kept per DB version and day (stale badges are day-based)."""
+    version = synced_db_version()
+    if version is None:
+        # No DB or a failed save: the version doesn't track edits, so don't cache
+        return _render_job_card_html(job)
+    key = (version, now_local().date())
+    cached = st.session_state.get('_job_card_html')
+    if cached is None or cached[0] != key:
+        cached = (key, {})
+        st.session_state._job_card_html = cached
+    html = cached[1].get(job['id'])
+    if html is None:
+        html = cached[1][job['id']] = _render_job_card_html(job)
+    return html
+
+def _render_job_card_html(job):
     tech = get_tech(job['techId'])
     loc = get_location(job['locationId'])
     loc_name = loc['name'] if loc else "Unknown"
@@ -4268,23 +4698,14 @@ def render_job_card(job, compact=False, key_suffix="", allow_delete=False):
         parts_color = "#10b981" if staged_parts == total_parts else "#a1a1aa"
         parts_html = f'<div style="color:{parts_color}; font-size:0.8em; margin-top:6px;">🔩 Parts: {staged_parts}/{total_parts} staged</div>'
 
+    return _JOB_CARD_TPL.substitute(
+        priority_class=priority_class, status_bg=status_bg, status=job['status'].upper(),
+        title=job['title'], priority=job['priority'], loc_html=loc_html, tech_name=tech_name,
+        date=job['date'][:10], stale_html=stale_html, parts_html=parts_html)
+
+def render_job_card(job, compact=False, key_suffix="", allow_delete=False):
     with st.container():
-        st.markdown(f"""
-        <div class="job-card {priority_class}" style="position:relative; overflow:hidden; border-top: 4px solid {status_bg};">
-            <div style="position:absolute; top:0; right:0; padding:2px 8px; background:{status_bg}; color:white; font-size:0.65em; font-weight:bold; border-bottom-left-radius:8px;">
-                {job['status'].upper()}
-            </div>
-            <div style="display:flex; justify-content:space-between; margin-top:10px;">
-                <span style="font-weight:bold; font-size:1.1em; max-width:70%;">{job['title']}</span>
-                <span style="font-size:0.8em; background:#3f3f46; padding:2px 6px; border-radius:4px; height:fit-content;">{job['priority']}</span>
-            </div>
-            <div style="color:#a1a1aa; font-size:0.9em; margin-top:5px;">{loc_html}</div>
-            <div style="display:flex; justify-content:space-between; margin-top:10px; font-size:0.8em; color:#71717a;">
-                 <span>👤 {tech_name}</span>
-                 <span>📅 {job['date'][:10]}</span>
-            </div>{stale_html}{parts_html}
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(job_card_html(job), unsafe_allow_html=True)
         # Status Dropdown
         status_options = ["Not Started", "In Progress", "Customer on Hold", "Waiting on Parts", "Parts not ordered", "Parts Staged", "Completed"]
         current_status = job['status']
@@ -4360,6 +4781,53 @@ def render_job_grid(jobs, key_suffix="", allow_delete=False, cols=3):
             render_job_card(job, key_suffix=key_suffix, allow_delete=allow_delete)
 
 
+def render_job_list(jobs, key_suffix="", allow_delete=False):
+    """Read-mostly card list for long lists (the Archive): every card goes out
+    in one st.markdown instead of a markdown + selectbox + buttons per job, and
+    a single picker opens the chosen job's details. Status changes happen in
+    the details dialog."""
+    if not jobs:
+        return
+    # strip(): a blank line between cards would end the HTML block in markdown
+    cards = "".join(job_card_html(j).strip() for j in jobs)
+    st.markdown(
+        f'<div style="display:grid;grid-template-columns:repeat(auto-fill,minmax(300px,1fr));gap:0 16px;">{cards}</div>',
+        unsafe_allow_html=True)
+    labels = {j['id']: f"{j['title']} · {j['date'][:10]}" for j in jobs}
+    if allow_delete:
+        c1, c2, c3, c4 = st.columns([4, 1, 0.5, 0.5], vertical_alignment="bottom")
+    else:
+        c1, c2 = st.columns([4, 1], vertical_alignment="bottom")
+    # No default pick: the buttons stay disabled until a job is chosen, so a
+    # stray click can't act on whichever job happens to be listed first
+    pick = c1.selectbox("Open job", list(labels), index=None, format_func=labels.get,
+                        key=f"job_list_pick_{key_suffix}")
+    if c2.button("Details", key=f"job_list_open_{key_suffix}", disabled=pick is None,
+                 use_container_width=True):
+        job_details_dialog(pick)
+    if allow_delete:
+        if c3.button(":material/edit:", key=f"job_list_edit_{key_suffix}", help="Edit Job",
+                     disabled=pick is None, use_container_width=True):
+            edit_job_dialog(pick)
+        # Holds the id the delete was asked for, so picking another job drops it
+        del_confirm_key = f"confirm_del_job_{key_suffix}"
+        if c4.button(":material/delete:", key=f"job_list_del_{key_suffix}", help="Delete Job",
+                     disabled=pick is None, use_container_width=True):
+            st.session_state[del_confirm_key] = pick
+        if pick is not None and st.session_state.get(del_confirm_key) == pick:
+            st.warning(f"Permanently delete **{labels[pick]}**? Its reports and history go with it.")
+            dc1, dc2 = st.columns(2)
+            if dc1.button("✅ Yes, Delete", key=f"job_list_del_yes_{key_suffix}", type="primary",
+                          use_container_width=True):
+                st.session_state.jobs = [j for j in st.session_state.jobs if j['id'] != pick]
+                del st.session_state[del_confirm_key]
+                save_state()
+                st.rerun()
+            if dc2.button("❌ Cancel", key=f"job_list_del_no_{key_suffix}", use_container_width=True):
+                del st.session_state[del_confirm_key]
+                st.rerun()
+
+
 def render_map_view(jobs):
     """Interactive Folium map: one dot per job at its location, colored by status
     (same palette as the Tech Board). Click a dot for a detail card + Navigate link."""
@@ -4384,26 +4852,47 @@ def render_map_view(jobs):
     st.markdown(legend, unsafe_allow_html=True)
 
     # Resolve a lat/lon for each job, geocoding any location that lacks one (then persist)
+    def _coords(loc):
+        try:
+            lat = float(loc['lat']) if loc.get('lat') is not None else None
+            lon = float(loc['lon']) if loc.get('lon') is not None else None
+        except (ValueError, TypeError):
+            return None, None
+        return lat, lon
+
     points = []
     skipped = 0
     geocoded_any = False
     with st.spinner("Locating jobs..."):
+        # Geocode every not-yet-located address concurrently (one request per
+        # address, however many jobs share it) rather than one after another
+        failures = geocode_failures()
+        now_ts = time.time()
+        missing = {}
+        for job in jobs:
+            loc = get_location(job['locationId'])
+            if loc and loc.get('address') and not all(_coords(loc)):
+                if now_ts - failures.get(loc['address'], 0) < GEOCODE_RETRY_SECONDS:
+                    continue  # failed recently - don't block this render retrying it
+                missing.setdefault(loc['address'], []).append(loc)
+        if missing:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=GEOCODE_WORKERS) as ex:
+                geocode = functools.partial(geocode_address, http=get_http_session())
+                for addr, (lat, lon) in zip(missing, ex.map(geocode, missing)):
+                    if lat and lon:
+                        for loc in missing[addr]:
+                            loc['lat'], loc['lon'] = lat, lon
+                        geocoded_any = True
+                        failures.pop(addr, None)
+                    else:
+                        failures[addr] = now_ts
+
         for job in jobs:
             loc = get_location(job['locationId'])
             if not loc or not loc.get('address'):
                 skipped += 1
                 continue
-            lat, lon = loc.get('lat'), loc.get('lon')
-            try:
-                lat = float(lat) if lat is not None else None
-                lon = float(lon) if lon is not None else None
-            except (ValueError, TypeError):
-                lat = lon = None
-            if not lat or not lon:
-                lat, lon = get_lat_lon_from_address(loc['address'])
-                if lat and lon:
-                    loc['lat'], loc['lon'] = lat, lon
-                    geocoded_any = True
+            lat, lon = _coords(loc)
             if lat and lon:
                 points.append((job, loc, lat, lon))
             else:
@@ -4466,6 +4955,116 @@ def render_map_view(jobs):
         st.caption(f"⚠️ {skipped} job(s) not shown — address missing or could not be geocoded.")
 
 
+@st.fragment
+def render_calendar_tab(jobs, current_tech):
+    """Month grid for the Calendar tab. A fragment, so paging months or
+    toggling 'only my jobs' redraws just the calendar, not every tab."""
+    st.subheader("📅 Job Schedule")
+    
+    # Month navigation (persisted in session so prev/next survive reruns)
+    if "cal_view" not in st.session_state:
+        _now = now_local()
+        st.session_state.cal_view = [_now.year, _now.month]
+    cal_year, month_num = st.session_state.cal_view
+
+    nav_prev, nav_title, nav_next, nav_today, nav_mine = st.columns([1, 3, 1, 1, 2])
+    if nav_prev.button("◀", key="cal_prev", use_container_width=True):
+        month_num -= 1
+        if month_num < 1:
+            month_num, cal_year = 12, cal_year - 1
+        st.session_state.cal_view = [cal_year, month_num]
+        st.rerun(scope="fragment")
+    if nav_next.button("▶", key="cal_next", use_container_width=True):
+        month_num += 1
+        if month_num > 12:
+            month_num, cal_year = 1, cal_year + 1
+        st.session_state.cal_view = [cal_year, month_num]
+        st.rerun(scope="fragment")
+    if nav_today.button("Today", key="cal_today", use_container_width=True):
+        _now = now_local()
+        st.session_state.cal_view = [_now.year, _now.month]
+        st.rerun(scope="fragment")
+    nav_title.markdown(
+        f"<h3 style='text-align:center; margin:0; color:#e4e4e7;'>{calendar.month_name[month_num]} {cal_year}</h3>",
+        unsafe_allow_html=True,
+    )
+
+    only_my_jobs = False
+    if current_tech:
+        only_my_jobs = nav_mine.toggle("👷 Only my jobs", key="cal_only_mine")
+
+    cal_jobs = jobs
+    if only_my_jobs and current_tech:
+        cal_jobs = [j for j in cal_jobs if j['techId'] == current_tech['id']]
+
+    # Build the whole month as one styled HTML grid (uniform cells, today
+    # highlighted, weekends shaded). Pills are hover-only, as before.
+    def _cal_esc(s):
+        return (str(s).replace('&', '&amp;').replace('<', '&lt;')
+                .replace('>', '&gt;').replace('"', '&quot;'))
+
+    today = now_local().date()
+    cal = calendar.monthcalendar(cal_year, month_num)
+
+    # Grid styles live in assets/style.css with the rest of the app CSS
+    cal_html = '<div class="cal-grid">'
+    for d in ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]:
+        cal_html += f'<div class="cal-hdr">{d}</div>'
+
+    for week in cal:
+        for i, day in enumerate(week):
+            if day == 0:
+                cal_html += '<div class="cal-cell cal-empty"></div>'
+                continue
+            is_today = (cal_year == today.year and month_num == today.month and day == today.day)
+            cls = "cal-cell"
+            if is_today:
+                cls += " cal-today"
+            elif i >= 5:
+                cls += " cal-weekend"
+
+            target_date_str = f"{cal_year}-{month_num:02d}-{day:02d}"
+            day_jobs = [j for j in cal_jobs if j['date'].startswith(target_date_str) and j['status'] != 'Completed']
+
+            cell = f'<div class="{cls}"><div class="cal-daynum">{day}</div>'
+            for job in day_jobs[:4]:
+                jtech = get_tech(job['techId'])
+                color = PRIORITY_COLORS.get(job.get('priority'), "#52525b")
+                initials = jtech['initials'] if jtech else "Un"
+                tip = _cal_esc(f"{job['title']} — {jtech['name'] if jtech else 'Unassigned'} [{job.get('priority', 'N/A')} · {job['status']}]")
+                label = _cal_esc(f"{initials} {job['title'][:12]}")
+                cell += f'<div class="cal-pill" style="background:{color};" title="{tip}">{label}</div>'
+            if len(day_jobs) > 4:
+                cell += f'<div class="cal-more">+{len(day_jobs) - 4} more</div>'
+            cell += '</div>'
+            cal_html += cell
+
+    cal_html += '</div>'
+
+    # Priority legend (pills are colored by priority)
+    legend = '<div style="display:flex; gap:14px; flex-wrap:wrap; margin-top:4px; font-size:0.75em; color:#a1a1aa;">'
+    for p_name, p_color in PRIORITY_COLORS.items():
+        legend += (f'<span style="display:inline-flex; align-items:center; gap:5px;">'
+                   f'<span style="width:11px; height:11px; border-radius:3px; background:{p_color}; display:inline-block;"></span>{p_name}</span>')
+    legend += '</div>'
+    cal_html += legend
+
+    st.markdown(cal_html, unsafe_allow_html=True)
+
+
+@st.fragment
+def render_map_tab(jobs, current_tech):
+    """Map tab body (active jobs); a fragment so the 'only my jobs' toggle reruns just the map."""
+    st.subheader("🗺️ Job Map")
+    map_only_mine = False
+    if current_tech:
+        map_only_mine = st.toggle("👷 Only my jobs", key="map_only_mine")
+    map_jobs = jobs
+    if map_only_mine and current_tech:
+        map_jobs = [j for j in map_jobs if j['techId'] == current_tech['id']]
+    render_map_view(map_jobs)
+
+
 def render_construction_board(user_email, can_manage):
     """Shared 5G Construction board. can_manage=True for the lead/admins (see all jobs,
     create/edit/delete); False for crew (see only their own assigned jobs)."""
@@ -4483,8 +5082,14 @@ def render_construction_board(user_email, can_manage):
 
     top_l, top_r = st.columns([4, 1])
     with top_l:
-        search = st.text_input("Search construction jobs...", key="constr_search",
-                               label_visibility="collapsed", placeholder="🔍 Search jobs, sites...")
+        # Same submit-to-filter form as the Security board's search
+        with st.form("constr_search_form", border=False, clear_on_submit=False):
+            s_in, s_btn = st.columns([5, 1], vertical_alignment="center")
+            s_in.text_input("Search construction jobs...", key="constr_search",
+                            label_visibility="collapsed", placeholder="🔍 Search jobs, sites...")
+            s_btn.form_submit_button("Search", use_container_width=True)
+        # Whitespace-only queries don't filter
+        search = st.session_state.get("constr_search", "").strip()
     with top_r:
         if can_manage:
             if st.button("➕ New Job", key="constr_new_job", use_container_width=True):
@@ -4492,15 +5097,12 @@ def render_construction_board(user_email, can_manage):
 
     if search:
         q = search.lower()
-        def _cm(j):
-            if q in j.get('title', '').lower() or q in j.get('description', '').lower():
-                return True
-            l = get_location(j['locationId'])
-            return bool(l and (q in l.get('name', '').lower() or q in l.get('address', '').lower()))
-        jobs = [j for j in jobs if _cm(j)]
+        hay = job_search_haystacks()
+        jobs = [j for j in jobs if q in hay.get(j['id'], '')]
 
-    active = [j for j in jobs if j['status'] != 'Completed']
-    done = [j for j in jobs if j['status'] == 'Completed']
+    active, done = [], []
+    for j in jobs:
+        (done if j['status'] == 'Completed' else active).append(j)
 
     # Quick stats
     s1, s2, s3 = st.columns(3)
@@ -4515,7 +5117,7 @@ def render_construction_board(user_email, can_manage):
 
     if done:
         with st.expander(f"📦 Completed ({len(done)})"):
-            render_job_grid(done, key_suffix="constr_done", allow_delete=can_manage)
+            render_job_list(done, key_suffix="constr_done", allow_delete=can_manage)
 
 
 def render_construction_app(user_name, user_email, role):
@@ -4541,16 +5143,47 @@ def render_construction_app(user_name, user_email, role):
     render_construction_board(user_email, can_manage=can_manage)
 
 
+ANALYTICS_COLUMNS = ("status", "priority", "type", "techId")
+
+def analytics_frame(jobs):
+    """The analytics charts' columns for all security jobs, as a DataFrame.
+    Only the charted fields are copied - not whole jobs with their reports."""
+    import pandas as pd
+    return pd.DataFrame(
+        [{c: j.get(c) for c in ANALYTICS_COLUMNS} for j in jobs if job_company(j) != 'construction'],
+        columns=ANALYTICS_COLUMNS)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _analytics_frame(key, _jobs):
+    """analytics_frame(), shared by all sessions. key is (synced DB version, job
+    count): every edit is saved and bumps the version, so the frame is rebuilt
+    once per change rather than on every tab switch."""
+    return analytics_frame(_jobs)
+
+def _jobs_per_tech(tech_ids, tech_map):
+    """Job counts per technician name for a techId column. Counts the ids in
+    one vectorized pass and maps just the distinct ids to names, rather than
+    mapping every row first; techs sharing a name are then merged."""
+    counts = tech_ids.value_counts(dropna=False)
+    counts.index = [tech_map.get(i, "Unassigned") for i in counts.index]
+    return counts.groupby(level=0).sum().sort_values(ascending=False)
+
 def render_analytics_dashboard():
     st.subheader("📊 Operational Analytics")
 
     # Security analytics only — construction is reported in its own section
-    _sec_jobs = [j for j in st.session_state.jobs if job_company(j) != 'construction']
-    if not _sec_jobs:
+    jobs = st.session_state.jobs
+    version = synced_db_version()
+    if version is None:
+        # Process-wide cache: only share a frame a saved version really describes
+        df = analytics_frame(jobs)
+    else:
+        df = _analytics_frame((version, len(jobs)), jobs)
+    if df.empty:
         st.info("No job data available.")
         return
-
-    df = pd.DataFrame(_sec_jobs)
+    tech_map = {t["id"]: t["name"] for t in st.session_state.techs}
+    tech_map[None] = "Unassigned"
 
     total = len(df)
     completed = len(df[df["status"] == "Completed"])
@@ -4583,9 +5216,7 @@ def render_analytics_dashboard():
         st.markdown("#### Tech Workload (Active)")
         active_jobs = df[df["status"] != "Completed"]
         if not active_jobs.empty:
-            tech_map = {t["id"]: t["name"] for t in st.session_state.techs}
-            tech_map[None] = "Unassigned"
-            workload = active_jobs["techId"].map(tech_map).fillna("Unassigned").value_counts()
+            workload = _jobs_per_tech(active_jobs["techId"], tech_map)
             st.bar_chart(workload)
 
     with c4:
@@ -4603,7 +5234,9 @@ def render_analytics_dashboard():
         with st.spinner("Analyzing all job reports..."):
             # 1. Gather all "Parts Used" text (security jobs only)
             all_parts_text = []
-            for j in _sec_jobs:
+            for j in jobs:
+                if job_company(j) == 'construction':
+                    continue
                 for r in j.get('reports', []):
                     if r.get('partsUsed'):
                         all_parts_text.append(f"- {r['partsUsed']}")
@@ -4626,9 +5259,8 @@ def render_analytics_dashboard():
                     Return ONLY valid JSON. Example: {{"Cat6 Cable (ft)": 500, "RJ45 Jacks": 10}}
                     """
                     try:
-                        response = client.models.generate_content(model=model_name, contents=prompt)
                         # Clean response to ensure just JSON
-                        json_str = response.text.strip()
+                        json_str = generate_text_cached(client, model_name, prompt).strip()
                         if "```json" in json_str:
                             json_str = json_str.split("```json")[1].split("```")[0]
                         elif "```" in json_str:
@@ -4651,11 +5283,8 @@ def render_analytics_dashboard():
     st.markdown("#### 🏆 Technician Leaderboard (Completed Jobs)")
     completed_jobs = df[df["status"] == "Completed"]
     if not completed_jobs.empty:
-        tech_map = {t["id"]: t["name"] for t in st.session_state.techs}
-        tech_map[None] = "Unassigned"
-        
         # Count completed jobs per tech
-        leaderboard = completed_jobs["techId"].map(tech_map).fillna("Unassigned").value_counts()
+        leaderboard = _jobs_per_tech(completed_jobs["techId"], tech_map)
         
         # Display as horizontal bar chart
         st.bar_chart(leaderboard, horizontal=True, color="#b91c1c")
@@ -4666,6 +5295,7 @@ def render_analytics_dashboard():
 
     # --- ADMIN ACCESS MANAGEMENT ---
 def render_hours_report(company="security"):
+    import pandas as pd
     st.caption("Summed from daily report 'Hours Worked'. Hours are credited to every tech listed 'On Site' for a report (or the report author if none were listed).")
 
     today = now_local().date()
@@ -4723,7 +5353,7 @@ def render_service_agreements():
     st.caption("Monitoring, service, inspection, and warranty contracts by site — with renewal alerts.")
 
     agreements = st.session_state.agreements
-    loc_by_id = {l['id']: l for l in st.session_state.locations}
+    loc_by_id = _id_index(st.session_state.locations, '_locations_by_id')
 
     # Summary
     active = [a for a in agreements if a.get('status') != 'Cancelled']
@@ -4759,7 +5389,7 @@ def render_service_agreements():
                         st.warning("Please enter a title.")
                     else:
                         st.session_state.agreements.append({
-                            'id': f"a{now_local().timestamp()}",
+                            'id': new_record_id('a'),
                             'locationId': loc_names[a_loc],
                             'type': a_type,
                             'title': a_title.strip(),
@@ -4862,7 +5492,6 @@ def _admin_access():
                         st.session_state.adminEmails.append(new_admin_email)
                         save_state(invalidate_briefing=False)
                         st.success(f"Added {new_admin_email}")
-                        st.rerun()
                     else:
                         st.warning("Email already exists.")
                 else:
@@ -4873,10 +5502,8 @@ def _admin_access():
             for email in st.session_state.adminEmails:
                 c1, c2 = st.columns([4, 1])
                 c1.write(email)
-                if c2.button(":material/delete:", key=f"del_admin_{email}"):
-                    st.session_state.adminEmails.remove(email)
-                    save_state(invalidate_briefing=False)
-                    st.rerun()
+                c2.button(":material/delete:", key=f"del_admin_{email}",
+                          on_click=remove_list_entry_callback, args=('adminEmails', email))
 
     with st.expander("🏗️ Manage 5G Construction Leads", expanded=False):
         st.write("Emails added here can log in (with any email address) and manage the "
@@ -4894,7 +5521,6 @@ def _admin_access():
                         st.session_state.construction_emails.append(new_cm_email.strip())
                         save_state(invalidate_briefing=False)
                         st.success(f"Added {new_cm_email}")
-                        st.rerun()
                     else:
                         st.warning("Email already exists.")
                 else:
@@ -4905,10 +5531,8 @@ def _admin_access():
             for email in st.session_state.construction_emails:
                 c1, c2 = st.columns([4, 1])
                 c1.write(email)
-                if c2.button(":material/delete:", key=f"del_cm_{email}"):
-                    st.session_state.construction_emails.remove(email)
-                    save_state(invalidate_briefing=False)
-                    st.rerun()
+                c2.button(":material/delete:", key=f"del_cm_{email}",
+                          on_click=remove_list_entry_callback, args=('construction_emails', email))
 
 
 def _admin_email():
@@ -4936,7 +5560,6 @@ def _admin_email():
                 }
                 save_state(invalidate_briefing=False)
                 st.success("SMTP Settings Saved to Database!")
-                st.rerun()
 
     st.subheader("📧 Daily Summary Email")
     with st.expander("Send a test of the daily ops summary"):
@@ -4960,6 +5583,11 @@ def _admin_email():
                     st.warning("Nothing was sent.")
 
 
+def _admin_esc(s):
+    return (str(s if s is not None else "").replace('&', '&amp;')
+            .replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;'))
+
+
 def _admin_techs():
     st.subheader("👷 Manage Technicians")
     with st.expander("Add / Remove Technicians", expanded=True):
@@ -4976,11 +5604,8 @@ def _admin_techs():
 
             if st.form_submit_button("Add Technician"):
                 if new_tech_name and new_tech_email and new_tech_initials:
-                    existing_ids = [int(t['id'][1:]) for t in st.session_state.techs if t['id'].startswith('t') and t['id'][1:].isdigit()]
-                    next_id = (max(existing_ids) if existing_ids else 0) + 1
-                    new_id = f"t{next_id}"
-                    import random
-                    color = random.choice(TECH_COLORS)
+                    new_id = next_seq_id(st.session_state.techs, 't')
+                    color = TECH_COLORS[len(st.session_state.techs) % TECH_COLORS_LEN]
 
                     _slug = re.sub(r'[^a-z0-9]', '', new_tech_name.lower())[:10] or 'tech'
                     st.session_state.techs.append({
@@ -5000,21 +5625,25 @@ def _admin_techs():
 
         if st.session_state.techs:
             st.write("###### Current Technicians")
-            for t in st.session_state.techs:
-                c1, c2, c3, c4 = st.columns([1, 3, 4, 1])
-                co_badge = "🏗️" if tech_company(t) == "construction" else "🛡️"
-                c1.markdown(f"**{t['initials']}** {co_badge}")
-
-                skills_display = ""
-                if t.get('skills'):
-                    skills_display = f" | 🛠️ {', '.join(t['skills'])}"
-
-                c2.write(f"{t['name']}{skills_display}")
-                c3.write(t['email'])
-                if c4.button(":material/delete:", key=f"del_tech_{t['id']}"):
-                    st.session_state.techs.remove(t)
-                    save_state(invalidate_briefing=False)
-                    st.rerun()
+            # One markdown blob for the whole list instead of a columns row +
+            # delete button per tech, so adding techs doesn't multiply widgets
+            rows = "".join(
+                f'<tr><td><span class="admin-initials" style="background:{_admin_esc(t.get("color", TECH_COLORS[0]))};">'
+                f'{_admin_esc(t["initials"])}</span> {"🏗️" if tech_company(t) == "construction" else "🛡️"}</td>'
+                f'<td>{_admin_esc(t["name"])}'
+                f'{"<br><small>🛠️ " + _admin_esc(", ".join(t["skills"])) + "</small>" if t.get("skills") else ""}</td>'
+                f'<td>{_admin_esc(t["email"])}</td></tr>'
+                for t in st.session_state.techs
+            )
+            st.markdown(f'<table class="admin-table">{rows}</table>', unsafe_allow_html=True)
+
+            techs_by_id = {t['id']: t for t in st.session_state.techs}
+            rc1, rc2 = st.columns([4, 1], vertical_alignment="bottom")
+            del_id = rc1.selectbox("Remove which?", options=list(techs_by_id), index=None,
+                                   format_func=lambda i: techs_by_id.get(i, {}).get('name', i), key="del_tech_pick")
+            rc2.button(":material/delete: Remove", key="del_tech_btn", disabled=del_id is None,
+                       use_container_width=True, on_click=remove_list_entry_callback,
+                       args=('techs',), kwargs={'pick_key': 'del_tech_pick'})
 
     st.subheader("📳 Push Notifications (ntfy)")
     with st.expander("Phone Push Setup & Testing", expanded=False):
@@ -5022,8 +5651,11 @@ def _admin_techs():
                  "to their personal topic below. After that, new job assignments buzz their phone instantly.")
         st.caption("Treat topic names like passwords — anyone who knows one can receive (and send) its notifications. "
                    "Notifications only contain the job title, never addresses or credentials.")
+        # Techs added before push support get their topic here - one save for all of them
+        with batched_saves():
+            topics = {t['id']: get_or_create_notify_topic(t) for t in st.session_state.techs}
         for t in st.session_state.techs:
-            topic = get_or_create_notify_topic(t)
+            topic = topics[t['id']]
             pc1, pc2, pc3 = st.columns([2, 3, 1])
             pc1.write(f"**{t['name']}**")
             pc2.code(topic, language=None)
@@ -5052,10 +5684,8 @@ def _admin_locations():
             if st.form_submit_button("Add Location"):
                 if l_name and l_addr:
                     final_addr = suggest_address_with_gemini(l_addr)
-                    existing_ids = [int(l['id'][1:]) for l in st.session_state.locations if l['id'].startswith('l') and l['id'][1:].isdigit()]
-                    next_id = (max(existing_ids) if existing_ids else 0) + 1
                     new_loc = {
-                        "id": f"l{next_id}",
+                        "id": next_seq_id(st.session_state.locations, 'l'),
                         "name": l_name,
                         "address": final_addr,
                         "mapsUrl": l_maps,
@@ -5065,25 +5695,29 @@ def _admin_locations():
                     st.session_state.locations.append(new_loc)
                     save_state(invalidate_briefing=False)
                     st.success(f"Added {l_name}")
-                    st.rerun()
                 else:
                     st.error("Name and Address required.")
 
         if st.session_state.locations:
             st.write("###### Current Locations")
-            for l in st.session_state.locations:
-                c1, c2, c3, c4 = st.columns([3, 4, 1, 1])
-                c1.write(l['name'])
-                contact_info = ""
-                if l.get('contact_name') or l.get('contact_phone'):
-                    contact_info = f" | 📞 {l.get('contact_name','')} {l.get('contact_phone','')}"
-                c2.caption(f"{l['address']}{contact_info}")
-                if c3.button(":material/edit:", key=f"edit_loc_{l['id']}"):
-                    edit_location_dialog(l['id'])
-                if c4.button(":material/delete:", key=f"del_loc_{l['id']}"):
-                    st.session_state.locations.remove(l)
-                    save_state(invalidate_briefing=False)
-                    st.rerun()
+            rows = "".join(
+                f'<tr><td>{_admin_esc(l["name"])}</td><td><small>{_admin_esc(l["address"])}'
+                f'{" | 📞 " + _admin_esc(l.get("contact_name", "")) + " " + _admin_esc(l.get("contact_phone", "")) if l.get("contact_name") or l.get("contact_phone") else ""}'
+                f'</small></td></tr>'
+                for l in st.session_state.locations
+            )
+            st.markdown(f'<table class="admin-table">{rows}</table>', unsafe_allow_html=True)
+
+            locs_by_id = {l['id']: l for l in st.session_state.locations}
+            lc1, lc2, lc3 = st.columns([4, 1, 1], vertical_alignment="bottom")
+            pick_id = lc1.selectbox("Edit or remove which?", options=list(locs_by_id), index=None,
+                                    format_func=lambda i: locs_by_id.get(i, {}).get('name', i), key="loc_pick")
+            if lc2.button(":material/edit: Edit", key="edit_loc_btn", disabled=pick_id is None,
+                          use_container_width=True):
+                edit_location_dialog(pick_id)
+            lc3.button(":material/delete: Remove", key="del_loc_btn", disabled=pick_id is None,
+                       use_container_width=True, on_click=remove_list_entry_callback,
+                       args=('locations',), kwargs={'pick_key': 'loc_pick'})
 
 
 def _admin_data():
@@ -5147,7 +5781,7 @@ def _admin_data():
         if uploaded_file is not None:
             if st.button("⚠️ Restore from Backup", key="restore_btn"):
                 try:
-                    data = json.load(uploaded_file)
+                    data = loads_state(uploaded_file.getvalue())
                     required_keys = ["jobs", "techs", "locations"]
                     if not all(k in data for k in required_keys):
                         st.error("Invalid backup file format.")
@@ -5228,6 +5862,7 @@ def _admin_diagnostics():
             st.code(f"Key Found: {'*' * (len(api_key)-4)}{api_key[-4:]}")
             if st.button("Run AI Diagnostics"):
                 try:
+                    from google import genai
                     client = genai.Client(api_key=api_key)
                     st.success("✅ Gemini Client Initialized.")
                     with st.spinner("Fetching available models..."):
@@ -5278,43 +5913,41 @@ def _admin_diagnostics():
                 if not success:
                     get_logger().log("Manual ping failed on all endpoints.")
                     st.error("Ping failed on all endpoints.")
-                st.rerun()
 
         logger = get_logger()
         logs = logger.get_logs()
         if logs:
             st.code("\n".join(logs), language="text")
-            if st.button("Refresh Logs"):
-                st.rerun()
+            st.button("Refresh Logs")  # the click's own rerun re-reads the logs
         else:
             st.info("No logs recorded yet.")
 
 
 def render_admin_panel():
     # --- DEDUPLICATE IDs (Fix for existing corrupted state) ---
-    if st.session_state.techs:
-        all_ids = [t['id'] for t in st.session_state.techs]
-        if len(all_ids) != len(set(all_ids)):
-            seen = set()
-            for t in st.session_state.techs:
-                if t['id'] in seen:
-                    existing_nums = [int(x['id'][1:]) for x in st.session_state.techs if x['id'].startswith('t') and x['id'][1:].isdigit()]
-                    next_num = (max(existing_nums) if existing_nums else 0) + 1
-                    t['id'] = f"t{next_num}"
-                seen.add(t['id'])
-            save_state(invalidate_briefing=False)
+    # Both fix-ups write back as one commit
+    with batched_saves():
+        if st.session_state.techs:
+            all_ids = [t['id'] for t in st.session_state.techs]
+            if len(all_ids) != len(set(all_ids)):
+                seen = set()
+                for t in st.session_state.techs:
+                    if t['id'] in seen:
+                        t['id'] = next_seq_id(st.session_state.techs, 't')
+                    seen.add(t['id'])
+                st.session_state.pop('_techs_by_id', None)  # ids changed in place
+                save_state(invalidate_briefing=False)
 
-    if st.session_state.locations:
-        all_l_ids = [l['id'] for l in st.session_state.locations]
-        if len(all_l_ids) != len(set(all_l_ids)):
-            seen = set()
-            for l in st.session_state.locations:
-                if l['id'] in seen:
-                    existing_nums = [int(x['id'][1:]) for x in st.session_state.locations if x['id'].startswith('l') and x['id'][1:].isdigit()]
-                    next_num = (max(existing_nums) if existing_nums else 0) + 1
-                    l['id'] = f"l{next_num}"
-                seen.add(l['id'])
-            save_state(invalidate_briefing=False)
+        if st.session_state.locations:
+            all_l_ids = [l['id'] for l in st.session_state.locations]
+            if len(all_l_ids) != len(set(all_l_ids)):
+                seen = set()
+                for l in st.session_state.locations:
+                    if l['id'] in seen:
+                        l['id'] = next_seq_id(st.session_state.locations, 'l')
+                    seen.add(l['id'])
+                st.session_state.pop('_locations_by_id', None)  # ids changed in place
+                save_state(invalidate_briefing=False)
 
     # Tile-based navigation: a grid of cards instead of one long scroll
     tiles = [
@@ -5448,12 +6081,128 @@ def render_tv_display(exitable=False):
     _tv_board()
 
 
+CHAT_CONTEXT_JOBS = 15
+# The sidebar keeps the last CHAT_HISTORY_MAX messages; all but the newest
+# CHAT_HISTORY_SHOWN are folded into one collapsed markdown block.
+CHAT_HISTORY_MAX = 20
+CHAT_HISTORY_SHOWN = 6
+_CHAT_STOPWORDS = {
+    'the', 'and', 'for', 'are', 'was', 'what', 'which', 'who', 'whats', 'how', 'many', 'any',
+    'job', 'jobs', 'with', 'that', 'this', 'there', 'have', 'has', 'about', 'show', 'tell',
+    'list', 'all', 'from', 'our', 'can', 'you', 'does', 'did', 'is', 'on', 'at', 'of',
+}
+
+def chat_job_haystack(j):
+    """Lowercased searchable text for a job: its own fields plus site and tech."""
+    loc = get_location(j.get('locationId')) or {}
+    tech = get_tech(j.get('techId')) or {}
+    return " ".join(str(x) for x in (
+        j.get('title'), j.get('description'), j.get('status'), j.get('priority'), j.get('type'),
+        loc.get('name'), loc.get('address'), tech.get('name'))).lower()
+
+def select_chat_jobs(question, jobs, limit=CHAT_CONTEXT_JOBS, haystacks=None):
+    """Picks the jobs worth sending to the chatbot for this question: those whose
+    title/description/site/tech mention its keywords, best matches first. With no
+    keyword hits (e.g. 'what's urgent?') falls back to active jobs by priority.
+    haystacks, if given, is chat_job_haystack() for each job, precomputed."""
+    terms = {w for w in re.findall(r"[a-z0-9]+", (question or "").lower())
+             if len(w) >= 3 and w not in _CHAT_STOPWORDS}
+    scored = []
+    if terms:
+        if haystacks is None:
+            haystacks = [chat_job_haystack(j) for j in jobs]
+        for j, haystack in zip(jobs, haystacks):
+            score = sum(1 for t in terms if t in haystack)
+            if score:
+                scored.append((score, j))
+    if scored:
+        scored.sort(key=lambda x: -x[0])
+        return [j for _, j in scored[:limit]]
+    rank = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}
+    active = [j for j in jobs if j['status'] != 'Completed']
+    active.sort(key=lambda j: rank.get(j.get('priority'), 4))
+    return active[:limit]
+
+# Questions mentioning any of these get job report text in the chat context;
+# otherwise reports are left out (they're most of the prompt's tokens).
+_CHAT_HISTORY_WORDS = {
+    'report', 'reports', 'history', 'notes', 'note', 'update', 'updates', 'progress',
+    'log', 'logged', 'visit', 'visits', 'last', 'recent', 'photo', 'photos', 'hours', 'done', 'did',
+}
+
+def chat_wants_history(question):
+    return bool(_CHAT_HISTORY_WORDS & set(re.findall(r"[a-z]+", (question or "").lower())))
+
+def chat_job_context(j, with_reports=True):
+    """A job as sent to the LLM: report text kept, photos reduced to a count.
+    with_reports=False sends just the report count."""
+    clean_job = {k: v for k, v in j.items() if k != 'reports'}
+    if not with_reports:
+        clean_job['report_count'] = len(j.get('reports', []))
+        return clean_job
+    clean_job['reports'] = [{
+        'timestamp': r.get('timestamp'),
+        'techId': r.get('techId'),
+        'content': r.get('content'),
+        'photo_count': len(r.get('photos', []))
+    } for r in j.get('reports', [])]
+    return clean_job
+
+# Filled with $-placeholders by render_chatbot; parsed once at import.
+CHAT_PROMPT = string.Template("""
+       You are a 5G Security Assistant.
+       Current Time: $now
+       Summary: $summary
+       Techs: $techs
+       Locations: $locations
+       Jobs (most relevant to the question, up to $limit): $jobs
+       
+       Answer based strictly on this data. $history_note
+       
+
+User Question: $question""")
+
+def chat_board_context():
+    """The question-independent part of the chatbot's work, reused across turns
+    until the DB version moves: the Security job list, each job's search
+    haystack, the board summary line, the techs JSON and each location's JSON."""
+    version = synced_db_version()
+    cached = st.session_state.get('_chat_board_ctx')
+    # A None version (no DB, or a failed save) doesn't track edits: rebuild
+    if cached is None or cached['version'] != version or version is None:
+        # Security chatbot — construction jobs are excluded entirely
+        sec_jobs = [j for j in st.session_state.jobs if job_company(j) != 'construction']
+        n_active = sum(1 for j in sec_jobs if j['status'] != 'Completed')
+        n_crit = sum(1 for j in sec_jobs if j['status'] != 'Completed' and j['priority'] in ('Critical', 'High'))
+        cached = {
+            'version': version,
+            'jobs': sec_jobs,
+            'haystacks': [chat_job_haystack(j) for j in sec_jobs],
+            'summary': (f"{len(sec_jobs)} jobs on record, {n_active} active ({n_crit} Critical/High), "
+                        f"{len(sec_jobs) - n_active} completed."),
+            'techs_json': dumps_state(st.session_state.techs),
+            # SECURITY: strip site credentials/systems (logins, passwords, IPs)
+            # before location data can reach the external LLM API
+            'locations_json': {
+                l['id']: dumps_state({k: v for k, v in l.items() if k not in ('credentials', 'systems')})
+                for l in st.session_state.locations
+            },
+        }
+        st.session_state._chat_board_ctx = cached
+    return cached
+
 def render_chatbot():
     st.sidebar.title("🤖 Tech Assistant")
     st.sidebar.markdown("Ask about jobs, history, or locations.")
     
-    # Display History
-    for msg in st.session_state.chat_history:
+    # Display History - older turns as a single block rather than a chat_message each
+    history = st.session_state.chat_history
+    if len(history) > CHAT_HISTORY_SHOWN:
+        with st.sidebar.expander(f"Earlier ({len(history) - CHAT_HISTORY_SHOWN} messages)"):
+            st.markdown("\n\n".join(
+                f"**{'You' if msg['role'] == 'user' else 'Assistant'}:** {msg['parts'][0]}"
+                for msg in history[:-CHAT_HISTORY_SHOWN]))
+    for msg in history[-CHAT_HISTORY_SHOWN:]:
         with st.sidebar.chat_message(msg["role"]):
             st.write(msg["parts"][0])
     
@@ -5473,52 +6222,37 @@ def render_chatbot():
         with st.sidebar.chat_message("user"):
             st.write(prompt)
         
-        # Contextualize Data (remove heavy base64 strings before sending to LLM).
-        # Security chatbot — exclude construction jobs entirely.
-        simple_jobs = []
-        for j in [j for j in st.session_state.jobs if job_company(j) != 'construction']:
-            clean_job = {k:v for k,v in j.items() if k != 'reports'}
-            
-            # Include text content of reports, but strip out photos to save tokens/bandwidth
-            clean_reports = []
-            for r in j.get('reports', []):
-                clean_reports.append({
-                    'timestamp': r.get('timestamp'),
-                    'techId': r.get('techId'),
-                    'content': r.get('content'),
-                    'photo_count': len(r.get('photos', []))
-                })
-            
-            clean_job['reports'] = clean_reports
-            simple_jobs.append(clean_job)
-        
-        # SECURITY: strip site credentials/systems (logins, passwords, IPs)
-        # before sending location data to the external LLM API
-        safe_locations = [
-            {k: v for k, v in l.items() if k not in ('credentials', 'systems')}
-            for l in st.session_state.locations
-        ]
-
-        system_context = f"""
-       You are a 5G Security Assistant.
-       Current Time: {now_local()}
-       Techs: {json.dumps(st.session_state.techs)}
-       Locations: {json.dumps(safe_locations)}
-       Jobs: {json.dumps(simple_jobs)}
-       
-       Answer based strictly on this data. If searching for history, note that detailed reports are not in this context, only summaries.
-       """
-        
-        full_prompt = f"{system_context}\n\nUser Question: {prompt}"
+        # Only the jobs relevant to the question go in; the summary line covers the rest.
+        board = chat_board_context()
+        with_reports = chat_wants_history(prompt)
+        simple_jobs = [chat_job_context(j, with_reports)
+                       for j in select_chat_jobs(prompt, board['jobs'], haystacks=board['haystacks'])]
+        history_note = ("Job reports are included as text with photo counts."
+                        if with_reports else
+                        "Job report text is not included in this context, only report counts.")
+
+        # Only the (pre-sanitized, pre-serialized) sites those jobs reference
+        used_loc_ids = {j.get('locationId') for j in simple_jobs}
+        locations_json = "[" + ", ".join(
+            v for lid, v in board['locations_json'].items() if lid in used_loc_ids) + "]"
+
+        full_prompt = CHAT_PROMPT.substitute(
+            now=now_local().strftime('%Y-%m-%d %H:%M'),
+            summary=board['summary'],
+            techs=board['techs_json'],
+            locations=locations_json,
+            limit=CHAT_CONTEXT_JOBS,
+            jobs=dumps_state(simple_jobs),
+            history_note=history_note,
+            question=prompt,
+        )
         
         try:
             with st.sidebar.chat_message("model"):
-                with st.spinner("Thinking..."):
-                    response = client.models.generate_content(model=model_name, contents=full_prompt)
-                    bot_reply = response.text
-                    st.write(bot_reply)
+                bot_reply = st.write_stream(stream_text(client, model_name, full_prompt))
                     
             st.session_state.chat_history.append({"role": "model", "parts": [bot_reply]})
+            del st.session_state.chat_history[:-CHAT_HISTORY_MAX]
         except Exception as e:
             st.sidebar.error(f"AI Error: {str(e)}")
             try:
@@ -5569,7 +6303,7 @@ def main():
         kiosk_param = st.query_params.get("kiosk")
     except Exception:
         kiosk_param = None
-    kiosk_token = (st.secrets.get("KIOSK_TOKEN") if "KIOSK_TOKEN" in st.secrets else None) or os.getenv("KIOSK_TOKEN")
+    kiosk_token = config_value("KIOSK_TOKEN")
     if kiosk_param and kiosk_token and kiosk_param == kiosk_token:
         render_tv_display(exitable=False)
         return
@@ -5582,28 +6316,36 @@ def main():
     # Pick up other users' saves: if the DB moved on since this session loaded,
     # refresh so we render current data (and so our next save doesn't conflict).
     try:
-        db_ver = get_db_version()
-        if db_ver is not None and st.session_state.get('_db_version') is not None and db_ver != st.session_state._db_version:
+        db_ver = get_db_version_recent()
+        if db_ver is not None and st.session_state.get('_db_version') is not None and db_ver > st.session_state._db_version:
             refresh_session_from_db()
     except Exception:
         pass
     # A full run means the page is being redrawn with fresh data - clear any pending banner
     st.session_state.pop('_pending_board_update', None)
 
+    user_email = user.get("email")
+    user_name = user.get("name")
+
+    # Session bootstrap fix-ups, written back as one commit
+    with batched_saves():
+        # Move any pre-R2 inline (base64) photos out of the state row, once per session
+        if not st.session_state.get('_inline_photos_checked'):
+            st.session_state._inline_photos_checked = True
+            if migrate_inline_photos(st.session_state.jobs):
+                save_state()
+
+        # 2. Determine Role (Admin or Tech)
+        # Bootstrapping: If no admins exist in DB, first login becomes Admin
+        if not st.session_state.adminEmails:
+            st.session_state.adminEmails.append(user_email)
+            save_state()
+            st.toast(f"First login detected. {user_email} is now Super Admin.", icon="🛡️")
+
     # Deep-link: open a job dialog requested from elsewhere (e.g. Site History)
     open_target = st.session_state.pop("_open_job_after_rerun", None)
     if open_target:
         job_details_dialog(open_target)
-
-    user_email = user.get("email")
-    user_name = user.get("name")
-    
-    # 2. Determine Role (Admin or Tech)
-    # Bootstrapping: If no admins exist in DB, first login becomes Admin
-    if not st.session_state.adminEmails:
-        st.session_state.adminEmails.append(user_email)
-        save_state()
-        st.toast(f"First login detected. {user_email} is now Super Admin.", icon="🛡️")
     
     is_admin = user_email in st.session_state.adminEmails
 
@@ -5620,7 +6362,7 @@ def main():
     # emails get in. Anyone else with a Google account sees a denial screen.
     is_known_tech = any((t.get('email') or '').lower() == (user_email or '').lower()
                         and tech_company(t) != 'construction' for t in st.session_state.techs)
-    allowed_domain = (st.secrets.get("ALLOWED_EMAIL_DOMAIN") if "ALLOWED_EMAIL_DOMAIN" in st.secrets else None) or os.getenv("ALLOWED_EMAIL_DOMAIN", "")
+    allowed_domain = config_value("ALLOWED_EMAIL_DOMAIN", "")
     domain_ok = bool(allowed_domain) and (user_email or '').lower().endswith("@" + allowed_domain.lower().lstrip("@"))
 
     if not (is_admin or is_known_tech or domain_ok):
@@ -5684,7 +6426,14 @@ def main():
             f'<div style="color:#71717a;font-size:10.5px;letter-spacing:1.5px;">JOB BOARD &nbsp;·&nbsp; {_today_lbl}</div></div></div>',
             unsafe_allow_html=True)
     with c2:
-        search = st.text_input("Search Jobs...", label_visibility="collapsed", placeholder="🔍 Search jobs, sites, techs...")
+        # Inside a form so the board re-filters on Enter, not on every keystroke
+        with st.form("search_form", border=False, clear_on_submit=False):
+            s_in, s_btn = st.columns([5, 1], vertical_alignment="center")
+            s_in.text_input("Search Jobs...", key="search_q", label_visibility="collapsed",
+                            placeholder="🔍 Search jobs, sites, techs...")
+            s_btn.form_submit_button("Search", use_container_width=True)
+        # Whitespace-only queries don't filter
+        search = st.session_state.get("search_q", "").strip()
     with c3:
         # Restricted Access: Only Admins can create jobs
         if is_admin:
@@ -5697,22 +6446,35 @@ def main():
     filtered_jobs = [j for j in st.session_state.jobs if job_company(j) != 'construction']
     if search:
         q = search.lower()
-
-        def job_matches(j):
-            if q in j['title'].lower() or q in j['description'].lower():
-                return True
-            j_loc = get_location(j['locationId'])
-            if j_loc and (q in j_loc.get('name', '').lower() or q in j_loc.get('address', '').lower()):
-                return True
-            j_tech = get_tech(j['techId'])
-            if j_tech and q in j_tech.get('name', '').lower():
-                return True
-            return False
-
-        filtered_jobs = [j for j in filtered_jobs if job_matches(j)]
+        hay = job_search_haystacks()
+        filtered_jobs = [j for j in filtered_jobs if q in hay.get(j['id'], '')]
 
     # Determine if current user is a tech
-    current_tech = next((t for t in st.session_state.techs if t['email'].lower() == user_email.lower()), None)
+    current_tech = get_tech_by_email(user_email)
+
+    # Partition the filtered jobs once; each tab below reads its bucket instead
+    # of re-scanning the whole list.
+    board_statuses = ["Not Started", "Parts not ordered", "Waiting on Parts", "Parts Staged", "Customer on Hold", "In Progress"]
+    buckets = {'active': [], 'archive': [], 'crit_feed': [], 'std_feed': [], 'mine': [],
+               'Service': [], 'Project': [], 'Leads': [], 'by_status': {s: [] for s in board_statuses}}
+    my_tech_id = current_tech['id'] if current_tech else None
+    for j in filtered_jobs:
+        status = j['status']
+        board_status = "Not Started" if status == "Pending" else status
+        if board_status in buckets['by_status']:
+            buckets['by_status'][board_status].append(j)
+        if status == 'Completed':
+            buckets['archive'].append(j)
+            continue
+        buckets['active'].append(j)
+        if j['priority'] in ('Critical', 'High'):
+            buckets['crit_feed'].append(j)
+        elif j['priority'] in ('Medium', 'Low'):
+            buckets['std_feed'].append(j)
+        if j['type'] in ('Service', 'Project', 'Leads'):
+            buckets[j['type']].append(j)
+        if my_tech_id and j['techId'] == my_tech_id:
+            buckets['mine'].append(j)
 
     # Navigation Tabs
     tabs_list = ["🌅 Briefing", "👷 Tech Board", "📅 Calendar", "🗺️ Map", "🧰 Service Calls", "🏗️ Projects", "🤝 Leads", "📦 Archive"]
@@ -5743,7 +6505,7 @@ def main():
         with tab_map["🙋‍♂️ My Assignments"]:
             _first = current_tech['name'].split()[0]
 
-            my_jobs = [j for j in filtered_jobs if j['techId'] == current_tech['id'] and j['status'] != 'Completed']
+            my_jobs = list(buckets['mine'])
             # Most urgent first: Critical > High > Medium > Low, then soonest date
             priority_rank = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}
             my_jobs.sort(key=lambda j: (priority_rank.get(j.get('priority'), 4), str(j.get('date', ''))))
@@ -5768,12 +6530,15 @@ def main():
             st.subheader("Daily Operational Briefing")
 
             # Stats + stale list computed up front so the tiles show live counts
-            sec_jobs = [j for j in st.session_state.jobs if job_company(j) != 'construction']
-            active = len([j for j in sec_jobs if j['status'] != 'Completed'])
-            crit = len([j for j in sec_jobs if j['priority'] == 'Critical'])
-
+            active = crit = 0
             stale_list = []
-            for sj in sec_jobs:
+            for sj in st.session_state.jobs:
+                if job_company(sj) == 'construction':
+                    continue
+                if sj['status'] != 'Completed':
+                    active += 1
+                if sj['priority'] == 'Critical':
+                    crit += 1
                 sd = get_job_stale_days(sj)
                 if sd is not None and sd >= STALE_JOB_DAYS:
                     stale_list.append((sj, sd))
@@ -5789,21 +6554,26 @@ def main():
                 for lbl, v, c in _tiles)
             st.markdown(f'<div style="display:flex;gap:10px;margin-bottom:12px;">{_tiles_html}</div>', unsafe_allow_html=True)
 
-            # Briefing display box
-            st.container(border=True).markdown(st.session_state.briefing)
+            # Briefing display box. Generation is on request only: every tab renders
+            # on every rerun, so an automatic LLM call here would stall first paint.
+            briefing_pending = st.session_state.briefing == "Data required to generate briefing."
+            if briefing_pending:
+                st.container(border=True).caption("No briefing for the current board yet — "
+                                                  "press **Generate Briefing** to have the AI write one.")
+            else:
+                st.container(border=True).markdown(st.session_state.briefing)
 
             # Controls for briefing
             c1, c2 = st.columns([1, 2])
-            if c1.button("🔄 Refresh Briefing", use_container_width=True):
+            if c1.button("✨ Generate Briefing" if briefing_pending else "🔄 Refresh Briefing",
+                         type="primary" if briefing_pending else "secondary",
+                         disabled=briefing_pending and not st.session_state.jobs,
+                         use_container_width=True):
+                if not briefing_pending:
+                    _briefing_for.clear()  # explicit refresh asks for a new take, not the cached one
                 with st.spinner("🤖 AI is updating your briefing..."):
-                    st.session_state.briefing = generate_morning_briefing()
-                    save_state(invalidate_briefing=False)
-                    st.rerun()
-
-            # Automatically generate briefing ONLY if it's the default first-time text
-            if st.session_state.briefing == "Data required to generate briefing." and st.session_state.jobs:
-                with st.spinner("🤖 AI is preparing your initial morning briefing..."):
-                    st.session_state.briefing = generate_morning_briefing()
+                    # A first generation may reuse the stored text if the board is unchanged
+                    st.session_state.briefing = generate_morning_briefing(force=not briefing_pending)
                     save_state(invalidate_briefing=False)
                     st.rerun()
 
@@ -5830,7 +6600,7 @@ def main():
 
             # Upcoming contract renewals — admins only (contract values are sensitive)
             if is_admin:
-                loc_by_id = {l['id']: l for l in st.session_state.locations}
+                loc_by_id = _id_index(st.session_state.locations, '_locations_by_id')
                 renewals = []
                 for a in st.session_state.get('agreements', []):
                     d = agreement_days_left(a)
@@ -5847,7 +6617,7 @@ def main():
 
         with col_feed:
             st.subheader("Priority Feed")
-            crit_jobs = [j for j in filtered_jobs if j['priority'] in ['Critical', 'High'] and j['status'] != 'Completed']
+            crit_jobs = buckets['crit_feed']
             if not crit_jobs:
                 st.caption("No critical jobs.")
             for job in crit_jobs:
@@ -5856,7 +6626,7 @@ def main():
             st.divider()
 
             st.subheader("Standard Feed")
-            std_jobs = [j for j in filtered_jobs if j['priority'] in ['Medium', 'Low'] and j['status'] != 'Completed']
+            std_jobs = buckets['std_feed']
             if not std_jobs:
                 st.caption("No standard jobs.")
             for job in std_jobs:
@@ -5867,14 +6637,10 @@ def main():
         if not st.session_state.techs:
             st.info("No technicians added. Go to Admin tab.")
         else:
-            board_statuses = ["Not Started", "Parts not ordered", "Waiting on Parts", "Parts Staged", "Customer on Hold", "In Progress"]
             cols = st.columns(len(board_statuses))
             for i, status in enumerate(board_statuses):
                 with cols[i]:
-                    if status == "Not Started":
-                        status_jobs = [j for j in filtered_jobs if j['status'] in ["Not Started", "Pending"]]
-                    else:
-                        status_jobs = [j for j in filtered_jobs if j['status'] == status]
+                    status_jobs = buckets['by_status'][status]
 
                     _s_color = get_status_color(status)
                     st.markdown(
@@ -5889,149 +6655,35 @@ def main():
 
     # 3. Calendar View
     with tab_map["📅 Calendar"]:
-        st.subheader("📅 Job Schedule")
-        
-        # Month navigation (persisted in session so prev/next survive reruns)
-        if "cal_view" not in st.session_state:
-            _now = now_local()
-            st.session_state.cal_view = [_now.year, _now.month]
-        cal_year, month_num = st.session_state.cal_view
-
-        nav_prev, nav_title, nav_next, nav_today, nav_mine = st.columns([1, 3, 1, 1, 2])
-        if nav_prev.button("◀", key="cal_prev", use_container_width=True):
-            month_num -= 1
-            if month_num < 1:
-                month_num, cal_year = 12, cal_year - 1
-            st.session_state.cal_view = [cal_year, month_num]
-            st.rerun()
-        if nav_next.button("▶", key="cal_next", use_container_width=True):
-            month_num += 1
-            if month_num > 12:
-                month_num, cal_year = 1, cal_year + 1
-            st.session_state.cal_view = [cal_year, month_num]
-            st.rerun()
-        if nav_today.button("Today", key="cal_today", use_container_width=True):
-            _now = now_local()
-            st.session_state.cal_view = [_now.year, _now.month]
-            st.rerun()
-        nav_title.markdown(
-            f"<h3 style='text-align:center; margin:0; color:#e4e4e7;'>{calendar.month_name[month_num]} {cal_year}</h3>",
-            unsafe_allow_html=True,
-        )
-
-        only_my_jobs = False
-        if current_tech:
-            only_my_jobs = nav_mine.toggle("👷 Only my jobs", key="cal_only_mine")
-
-        cal_jobs = filtered_jobs
-        if only_my_jobs and current_tech:
-            cal_jobs = [j for j in cal_jobs if j['techId'] == current_tech['id']]
-
-        # Build the whole month as one styled HTML grid (uniform cells, today
-        # highlighted, weekends shaded). Pills are hover-only, as before.
-        def _cal_esc(s):
-            return (str(s).replace('&', '&amp;').replace('<', '&lt;')
-                    .replace('>', '&gt;').replace('"', '&quot;'))
-
-        today = now_local().date()
-        cal = calendar.monthcalendar(cal_year, month_num)
-
-        cal_css = (
-            "<style>"
-            ".cal-grid{display:grid;grid-template-columns:repeat(7,1fr);gap:6px;margin-top:10px;}"
-            ".cal-hdr{text-align:center;font-weight:bold;color:#a1a1aa;font-size:0.75em;"
-            "padding:4px 0;text-transform:uppercase;letter-spacing:0.5px;}"
-            ".cal-cell{background:#18181b;border:1px solid #27272a;border-radius:8px;"
-            "min-height:104px;padding:6px;overflow:hidden;}"
-            ".cal-empty{background:transparent;border:1px solid transparent;}"
-            ".cal-weekend{background:#141417;}"
-            ".cal-today{border:2px solid #b91c1c;background:#201416;}"
-            ".cal-daynum{font-size:0.8em;font-weight:bold;color:#d4d4d8;margin-bottom:4px;}"
-            ".cal-today .cal-daynum{color:#ef4444;}"
-            ".cal-pill{color:white;padding:2px 6px;border-radius:4px;font-size:0.7em;"
-            "margin-bottom:3px;white-space:nowrap;overflow:hidden;text-overflow:ellipsis;cursor:help;}"
-            ".cal-more{font-size:0.65em;color:#a1a1aa;padding-left:2px;}"
-            "</style>"
-        )
-
-        cal_html = cal_css + '<div class="cal-grid">'
-        for d in ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]:
-            cal_html += f'<div class="cal-hdr">{d}</div>'
-
-        for week in cal:
-            for i, day in enumerate(week):
-                if day == 0:
-                    cal_html += '<div class="cal-cell cal-empty"></div>'
-                    continue
-                is_today = (cal_year == today.year and month_num == today.month and day == today.day)
-                cls = "cal-cell"
-                if is_today:
-                    cls += " cal-today"
-                elif i >= 5:
-                    cls += " cal-weekend"
-
-                target_date_str = f"{cal_year}-{month_num:02d}-{day:02d}"
-                day_jobs = [j for j in cal_jobs if j['date'].startswith(target_date_str) and j['status'] != 'Completed']
-
-                cell = f'<div class="{cls}"><div class="cal-daynum">{day}</div>'
-                for job in day_jobs[:4]:
-                    jtech = get_tech(job['techId'])
-                    color = PRIORITY_COLORS.get(job.get('priority'), "#52525b")
-                    initials = jtech['initials'] if jtech else "Un"
-                    tip = _cal_esc(f"{job['title']} — {jtech['name'] if jtech else 'Unassigned'} [{job.get('priority', 'N/A')} · {job['status']}]")
-                    label = _cal_esc(f"{initials} {job['title'][:12]}")
-                    cell += f'<div class="cal-pill" style="background:{color};" title="{tip}">{label}</div>'
-                if len(day_jobs) > 4:
-                    cell += f'<div class="cal-more">+{len(day_jobs) - 4} more</div>'
-                cell += '</div>'
-                cal_html += cell
-
-        cal_html += '</div>'
-
-        # Priority legend (pills are colored by priority)
-        legend = '<div style="display:flex; gap:14px; flex-wrap:wrap; margin-top:4px; font-size:0.75em; color:#a1a1aa;">'
-        for p_name, p_color in PRIORITY_COLORS.items():
-            legend += (f'<span style="display:inline-flex; align-items:center; gap:5px;">'
-                       f'<span style="width:11px; height:11px; border-radius:3px; background:{p_color}; display:inline-block;"></span>{p_name}</span>')
-        legend += '</div>'
-        cal_html += legend
-
-        st.markdown(cal_html, unsafe_allow_html=True)
+        render_calendar_tab(buckets['active'], current_tech)
 
     # 3.5 Map View
     with tab_map["🗺️ Map"]:
-        st.subheader("🗺️ Job Map")
-        map_only_mine = False
-        if current_tech:
-            map_only_mine = st.toggle("👷 Only my jobs", key="map_only_mine")
-        map_jobs = [j for j in filtered_jobs if j['status'] != 'Completed']
-        if map_only_mine and current_tech:
-            map_jobs = [j for j in map_jobs if j['techId'] == current_tech['id']]
-        render_map_view(map_jobs)
+        render_map_tab(buckets['active'], current_tech)
 
     # 4. Service Calls
     with tab_map["🧰 Service Calls"]:
-        service_jobs = [j for j in filtered_jobs if j['type'] == 'Service' and j['status'] != 'Completed']
+        service_jobs = buckets['Service']
         if not service_jobs: st.info("No active service calls.")
         render_job_grid(service_jobs, key_suffix="service", allow_delete=is_admin)
 
     # 5. Projects
     with tab_map["🏗️ Projects"]:
-        proj_jobs = [j for j in filtered_jobs if j['type'] == 'Project' and j['status'] != 'Completed']
+        proj_jobs = buckets['Project']
         if not proj_jobs: st.info("No active projects.")
         render_job_grid(proj_jobs, key_suffix="project", allow_delete=is_admin)
 
     # 🤝 Leads
     with tab_map["🤝 Leads"]:
-        lead_jobs = [j for j in filtered_jobs if j['type'] == 'Leads' and j['status'] != 'Completed']
+        lead_jobs = buckets['Leads']
         if not lead_jobs: st.info("No active leads.")
         render_job_grid(lead_jobs, key_suffix="leads", allow_delete=is_admin)
 
     # 6. Archive
     with tab_map["📦 Archive"]:
-        archived = [j for j in filtered_jobs if j['status'] == 'Completed']
+        archived = buckets['archive']
         if not archived: st.info("No archived jobs.")
-        render_job_grid(archived, key_suffix="archive", allow_delete=is_admin)
+        render_job_list(archived, key_suffix="archive", allow_delete=is_admin)
 
     # 7. Admin (Only if Admin)
     if is_admin:
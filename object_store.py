@@ -61,7 +61,11 @@ def get_bucket_name():
            os.environ.get("AWS_BUCKET_NAME") or st.secrets.get("AWS_BUCKET_NAME") or \
            os.environ.get("S3_BUCKET") or st.secrets.get("S3_BUCKET")
 
-def upload_bytes(data, key, content_type):
+# For keys derived from the content itself (photos/<sha256>.jpg): the bytes
+# behind such a key never change, so browsers may keep them indefinitely.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def upload_bytes(data, key, content_type, cache_control=None):
     s3 = get_r2_client()
     bucket = get_bucket_name()
     if not s3:
@@ -71,7 +75,8 @@ def upload_bytes(data, key, content_type):
         st.error("⚠️ Bucket name not configured.")
         return None
     try:
-        s3.put_object(Bucket=bucket, Key=key, Body=data, ContentType=content_type)
+        extra = {'CacheControl': cache_control} if cache_control else {}
+        s3.put_object(Bucket=bucket, Key=key, Body=data, ContentType=content_type, **extra)
         return key
     except ClientError as e:
         st.error(f"❌ Upload Failed: {e}")
@@ -1,14 +1,37 @@
 import os
 import json
+import hashlib
 import streamlit as st
 
 try:
     import psycopg2
-    from psycopg2.extras import RealDictCursor
+    from psycopg2.extras import RealDictCursor, register_default_jsonb
     HAS_PSYCOPG2 = True
 except ImportError:
     HAS_PSYCOPG2 = False
 
+# orjson parses/serializes the state blob several times faster than the stdlib;
+# fall back to json when it isn't installed.
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+def dumps_state(data, default=None):
+    if HAS_ORJSON:
+        return orjson.dumps(data, default=default, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(data, separators=(",", ":"), default=default)
+
+def loads_state(raw):
+    if HAS_ORJSON:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+# psycopg2 decodes JSONB columns itself - route that through loads_state too
+if HAS_PSYCOPG2:
+    register_default_jsonb(globally=True, loads=loads_state)
+
 # Default data structure    
 DEFAULT_DATA = {
     "jobs": [],
@@ -86,6 +109,25 @@ def load_state():
     finally:
         conn.close()
 
+@st.cache_data(ttl=2, show_spinner=False)
+def get_db_version_recent():
+    """get_db_version(), shared by all sessions for a couple of seconds. For the
+    per-rerun "did someone else save?" check, where a fresh round-trip on every
+    click costs more than the check is worth. May lag by up to the TTL, so
+    compare with > rather than != (versions only go up)."""
+    return get_db_version()
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _load_state_at_version(version):
+    return load_state()
+
+def load_state_cached():
+    """Returns (data_dict, version_int), re-reading the JSONB blob only when the
+    row version has moved. The version check is a single-int query, so new
+    sessions and periodic refreshes skip the full parse when nothing changed.
+    st.cache_data hands back a copy, so callers are free to mutate the result."""
+    return _load_state_at_version(get_db_version())
+
 class StaleStateError(Exception):
     """Raised when the DB row has a newer version than the one this session loaded.
     Saving anyway would silently overwrite someone else's changes."""
@@ -102,20 +144,37 @@ def get_db_version():
     finally:
         conn.close()
 
-def save_state_to_db(data, expected_version=None):
+def save_state_to_db(data, expected_version=None, payload=None):
     """Saves data to DB, incrementing version.
     If expected_version is provided and the row has moved past it (someone else
-    saved first), raises StaleStateError instead of clobbering their changes."""
+    saved first), raises StaleStateError instead of clobbering their changes.
+    The version check is folded into the UPDATE itself, so a normal save is one
+    statement and one round-trip with no row lock held in between.
+    payload is the already-serialized data, if the caller has it."""
+    if payload is None:
+        payload = dumps_state(data)
     conn = get_connection()
     try:
         with conn.cursor() as cur:
             if expected_version is not None:
-                cur.execute("SELECT version FROM app_state WHERE key = 'global_state' FOR UPDATE")
+                cur.execute(
+                    """
+                    UPDATE app_state
+                    SET value = %s, version = version + 1, updated_at = CURRENT_TIMESTAMP
+                    WHERE key = 'global_state' AND version = %s
+                    RETURNING version;
+                    """,
+                    (payload, expected_version)
+                )
+                row = cur.fetchone()
+                if row:
+                    conn.commit()
+                    return row[0]
+                cur.execute("SELECT version FROM app_state WHERE key = 'global_state'")
                 row = cur.fetchone()
-                current_version = row[0] if row else None
-                if current_version is not None and current_version != expected_version:
+                if row:
                     raise StaleStateError(
-                        f"DB is at version {current_version}, but this session loaded version {expected_version}."
+                        f"DB is at version {row[0]}, but this session loaded version {expected_version}."
                     )
             cur.execute(
                 """
@@ -125,7 +184,7 @@ def save_state_to_db(data, expected_version=None):
                 DO UPDATE SET value = EXCLUDED.value, version = app_state.version + 1, updated_at = CURRENT_TIMESTAMP
                 RETURNING version;
                 """,
-                (json.dumps(data),)
+                (payload,)
             )
             new_version = cur.fetchone()[0]
         conn.commit()
@@ -136,10 +195,130 @@ def save_state_to_db(data, expected_version=None):
     finally:
         conn.close()
 
+def append_report_to_db(job_index, job_id, report, expected_version, status=None, briefing=None):
+    """Appends one report to jobs[job_index] inside the stored JSONB (and sets
+    the job's status / the briefing if given), so the client ships a single
+    report instead of the whole state blob. Only applies if the row is still at
+    expected_version and that slot still holds job_id; returns the new version,
+    or None if it didn't apply (caller falls back to a full save)."""
+    expr = ("jsonb_set(value, ARRAY['jobs', %(idx)s, 'reports'], "
+            "COALESCE(value->'jobs'->%(i)s->'reports', '[]'::jsonb) || jsonb_build_array(%(report)s::jsonb))")
+    if status is not None:
+        expr = f"jsonb_set({expr}, ARRAY['jobs', %(idx)s, 'status'], to_jsonb(%(status)s::text))"
+    if briefing is not None:
+        expr = f"jsonb_set({expr}, '{{briefing}}', to_jsonb(%(briefing)s::text))"
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                UPDATE app_state
+                SET value = {expr}, version = version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE key = 'global_state' AND version = %(version)s
+                  AND value->'jobs'->%(i)s->>'id' = %(job_id)s
+                RETURNING version;
+                """,
+                {'idx': str(job_index), 'i': job_index, 'report': dumps_state(report),
+                 'status': status, 'briefing': briefing, 'version': expected_version, 'job_id': job_id}
+            )
+            row = cur.fetchone()
+        conn.commit()
+        return row[0] if row else None
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def set_job_fields_in_db(job_index, job_id, fields, expected_version, briefing=None):
+    """Like append_report_to_db, for in-place edits: overwrites the given
+    top-level fields of jobs[job_index] (and the briefing if given) inside the
+    stored JSONB. Same version/job-id guard; returns the new version or None."""
+    expr = "value"
+    params = {'idx': str(job_index), 'i': job_index, 'briefing': briefing,
+              'version': expected_version, 'job_id': job_id}
+    for n, (key, val) in enumerate(fields.items()):
+        expr = f"jsonb_set({expr}, ARRAY['jobs', %(idx)s, %(k{n})s], %(v{n})s::jsonb)"
+        params[f'k{n}'] = key
+        params[f'v{n}'] = dumps_state(val)
+    if briefing is not None:
+        expr = f"jsonb_set({expr}, '{{briefing}}', to_jsonb(%(briefing)s::text))"
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                UPDATE app_state
+                SET value = {expr}, version = version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE key = 'global_state' AND version = %(version)s
+                  AND value->'jobs'->%(i)s->>'id' = %(job_id)s
+                RETURNING version;
+                """,
+                params
+            )
+            row = cur.fetchone()
+        conn.commit()
+        return row[0] if row else None
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def claim_state_flag(field, value):
+    """Atomically sets the top-level text field to value unless it already
+    holds it. Returns True if this call made the change, False if another
+    process got there first - a once-per-day job claims its date with this
+    before doing the work, so concurrent schedulers can't both run it.
+    Not version-guarded: only the one field is touched."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE app_state
+                SET value = jsonb_set(value, ARRAY[%(field)s], to_jsonb(%(value)s::text)),
+                    version = version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE key = 'global_state' AND (value->>%(field)s) IS DISTINCT FROM %(value)s
+                RETURNING version;
+                """,
+                {'field': field, 'value': value}
+            )
+            row = cur.fetchone()
+        conn.commit()
+        return row is not None
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def release_state_flag(field, value, previous):
+    """Undoes claim_state_flag (the work failed and should be retried), putting
+    back the previous value - if the field still holds the claimed one."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE app_state
+                SET value = jsonb_set(value, ARRAY[%(field)s], %(previous)s::jsonb),
+                    version = version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE key = 'global_state' AND value->>%(field)s = %(value)s;
+                """,
+                {'field': field, 'value': value, 'previous': dumps_state(previous)}
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
 def ensure_loaded_into_session():
     """Ensures st.session_state.db is populated."""
     if 'db' not in st.session_state:
-        data, version = load_state()
+        data, version = load_state_cached()
         st.session_state.db = data
         st.session_state._db_version = version
 
@@ -152,12 +331,25 @@ def commit_from_session(invalidate_briefing=True):
     if invalidate_briefing:
         st.session_state.db['briefing'] = "Data required to generate briefing."
 
+    # Skip the write when nothing changed since this session's last save (a
+    # callback that re-set the same value, a dialog submitted untouched).
+    # Serializing locally is far cheaper than shipping the blob to Postgres.
+    payload = dumps_state(st.session_state.db)
+    digest = hashlib.sha1(payload.encode()).hexdigest()
+    expected = st.session_state.get('_db_version')
+    if st.session_state.get('_saved_digest') == (expected, digest):
+        return
+
     try:
-        new_ver = save_state_to_db(st.session_state.db, expected_version=st.session_state.get('_db_version'))
+        new_ver = save_state_to_db(st.session_state.db, expected_version=expected, payload=payload)
         st.session_state._db_version = new_ver
+        st.session_state._saved_digest = (new_ver, digest)
+        st.session_state.pop('_save_failed', None)
     except StaleStateError:
         raise
     except Exception as e:
+        # The session now holds changes its _db_version doesn't describe
+        st.session_state._save_failed = True
         st.error(f"Failed to save to DB: {e}")
 
 def force_overwrite_from_session(invalidate_briefing=False):
@@ -171,5 +363,7 @@ def force_overwrite_from_session(invalidate_briefing=False):
     try:
         new_ver = save_state_to_db(st.session_state.db)
         st.session_state._db_version = new_ver
+        st.session_state.pop('_save_failed', None)
     except Exception as e:
+        st.session_state._save_failed = True
         st.error(f"Failed to save to DB: {e}")